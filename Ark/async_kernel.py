@@ -0,0 +1,232 @@
+"""
+Async Kernel - asyncio front end for the JARVIS kernel
+
+Runs user input, chat turns, background jobs, fact flushing and periodic
+maintenance as cooperative asyncio tasks. Blocking kernel work (model calls,
+tools) runs in worker threads, so a long analysis started with /bg keeps
+going while the user continues chatting.
+
+Usage:
+    python async_kernel.py
+    ARK_AUTO_COMPACT=1 python async_kernel.py   # also drop exact-duplicate notes every 6 hours
+
+Extra commands on top of the normal kernel modes:
+    /bg <request>   Run a chat turn in the background
+    /jobs           List background jobs and their progress
+"""
+
+import asyncio
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from colorama import Fore, Style
+
+import kernel
+
+
+FLUSH_INTERVAL = 5.0  # seconds between background fact flushes
+COMPACT_INTERVAL = 6 * 3600.0  # seconds between background library compactions
+# Opt-in: notes carry no timestamps, so repeated log lines ("leg day done") may be separate events
+AUTO_COMPACT = os.environ.get("ARK_AUTO_COMPACT") == "1"
+
+
+class Job:
+    """A background chat turn and its progress counters"""
+
+    def __init__(self, job_id: int, request: str):
+        self.id = job_id
+        self.request = request
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.tokens = 0
+        self.tool_runs = 0
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        return "done" if self.finished is not None else "running"
+
+    def describe(self) -> str:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return (f"[JOB {self.id}] {self.status} {elapsed:.1f}s | "
+                f"{self.tokens} tokens, {self.tool_runs} tool runs | {self.request[:40]}")
+
+
+class AsyncKernel:
+    """
+    Cooperative kernel event loop
+
+    Maintenance callables registered with add_maintenance() run in a worker
+    thread every `interval` seconds (e.g. index refreshes).
+    """
+
+    def __init__(self):
+        self.jobs: Dict[int, Job] = {}
+        self.job_ids = itertools.count(1)
+        self.notifications: asyncio.Queue = asyncio.Queue()
+        self.maintenance: List[Tuple[Callable[[], None], float]] = []
+        self.running = True
+
+    def add_maintenance(self, func: Callable[[], None], interval: float):
+        """Run func in the background every interval seconds"""
+        self.maintenance.append((func, interval))
+
+    def notify(self, message: str):
+        """Queue a notification; safe to call from worker threads"""
+        self.loop.call_soon_threadsafe(self.notifications.put_nowait, message)
+
+    # --- background tasks ---
+    async def _notifier(self):
+        while self.running:
+            message = await self.notifications.get()
+            print(f"\n{Fore.CYAN}{message}{Style.RESET_ALL}")
+
+    async def _fact_flusher(self):
+        while self.running:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await asyncio.to_thread(kernel.FACTS.flush)
+
+    async def _maintain(self, func, interval):
+        while self.running:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(func)
+            except Exception as e:
+                self.notify(f"[MAINTENANCE] {getattr(func, '__name__', func)} failed: {e}")
+
+    async def _run_job(self, job: Job):
+        def on_token(token):
+            job.tokens += 1
+
+        def on_tool_output(output):
+            job.tool_runs += 1
+            self.notify(f"[JOB {job.id}] tools finished, continuing...")
+
+        try:
+            job.result = await asyncio.to_thread(kernel.chat_turn, job.request, on_token, on_tool_output)
+            job.finished = time.perf_counter()
+            self.notify(f"[JOB {job.id}] done in {job.finished - job.started:.1f}s\n{job.result}")
+        except Exception as e:
+            job.error = str(e)
+            job.finished = time.perf_counter()
+            self.notify(f"[JOB {job.id}] failed: {e}")
+
+    def start_job(self, request: str) -> Job:
+        job = Job(next(self.job_ids), request)
+        job.task = asyncio.create_task(self._run_job(job))
+        self.jobs[job.id] = job
+        return job
+
+    # --- foreground ---
+    async def read_line(self, prompt: str) -> str:
+        """
+        input() on a daemon thread
+
+        A thread stuck in input() is never joined, so Ctrl-C (which cancels
+        the main task) does not wait for Enter before shutting down.
+        """
+        future = self.loop.create_future()
+
+        def deliver(setter, value):
+            if not future.done():
+                setter(value)
+
+        def reader():
+            try:
+                line = input(prompt)
+            except BaseException as e:  # EOFError, or KeyboardInterrupt on Windows consoles
+                setter, value = future.set_exception, e
+            else:
+                setter, value = future.set_result, line
+            try:
+                self.loop.call_soon_threadsafe(deliver, setter, value)
+            except RuntimeError:
+                pass  # loop already closed
+
+        threading.Thread(target=reader, name="ark-input", daemon=True).start()
+        return await future
+
+    async def handle(self, user_input: str):
+        """Route one line of user input"""
+        lowered = user_input.lower()
+        if lowered.startswith("/bg "):
+            job = self.start_job(user_input[4:].strip())
+            print(f"{Fore.MAGENTA}>>> STARTED JOB {job.id} in background{Style.RESET_ALL}")
+        elif lowered == "/jobs":
+            if not self.jobs:
+                print(f"{Fore.YELLOW}No background jobs.{Style.RESET_ALL}")
+            for job in self.jobs.values():
+                print(job.describe())
+        elif lowered.startswith("/search "):
+            query = user_input[8:].strip()
+            result = await asyncio.to_thread(kernel.search_notes, query)
+            print(f"{Fore.GREEN}JARVIS >> {Style.RESET_ALL}{result}")
+        elif lowered.startswith("/save "):
+            info = user_input[6:].strip()
+            await asyncio.to_thread(kernel.save_note, info)
+            print(f"{Fore.GREEN}JARVIS >> {Style.RESET_ALL}Got it! I'll remember that.")
+        else:
+            await asyncio.to_thread(kernel.chat_turn, user_input)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        kernel.AUTO_FLUSH = False
+        background = [
+            asyncio.create_task(self._notifier()),
+            asyncio.create_task(self._fact_flusher()),
+        ] + [asyncio.create_task(self._maintain(func, interval)) for func, interval in self.maintenance]
+
+        print(f"{Fore.GREEN}======================================================{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}          JARVIS ONLINE - ASYNC KERNEL{Style.RESET_ALL}")
+        print(f"{Fore.GREEN}======================================================{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}MODES: /search <query> | /save <info> | /bg <request> | /jobs | /chat (default){Style.RESET_ALL}")
+        print(f"{Fore.CYAN}Type 'exit' to quit{Style.RESET_ALL}")
+        print()
+
+        try:
+            while self.running:
+                user_input = await self.read_line(f"{Fore.BLUE}YOU >> {Style.RESET_ALL}")
+                if user_input.lower() in ["exit", "quit"]:
+                    break
+                if user_input.strip():
+                    await self.handle(user_input)
+        except (KeyboardInterrupt, EOFError, asyncio.CancelledError):  # Ctrl-C cancels this task under asyncio.run
+            print(f"\n{Fore.YELLOW}Graceful shutdown...{Style.RESET_ALL}")
+        finally:
+            self.running = False
+            pending = [job.task for job in self.jobs.values() if job.status == "running"]
+            if pending:
+                print(f"{Fore.YELLOW}Waiting for {len(pending)} background job(s)...{Style.RESET_ALL}")
+                await asyncio.gather(*pending, return_exceptions=True)
+            for task in background:
+                task.cancel()
+            await asyncio.to_thread(kernel.FACTS.flush)
+            kernel.AUTO_FLUSH = True
+
+
+def compact_library():
+    """Maintenance job: drop exact duplicates from library/*.txt and refresh the search indexes"""
+    import librarian
+    # Near-duplicates can be updated facts; removing them needs a human (librarian.py compact --near)
+    librarian.compact_library(threshold=1.0)
+
+
+def main():
+    ark = AsyncKernel()
+    if AUTO_COMPACT:
+        ark.add_maintenance(compact_library, COMPACT_INTERVAL)
+    try:
+        asyncio.run(ark.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Kernel Benchmark - Replay conversations to measure kernel overhead
+
+Replays the transcripts in brain.json / brain_data.json through the real
+kernel pipeline (auto-learn, memory, library context, directive parsing,
+tool dispatch) against a mock LLM that returns the recorded AI replies
+instantly. Whatever time remains is kernel overhead.
+
+Runs in a scratch directory so brain.json and library/ are never touched.
+
+Usage:
+    python bench_kernel.py                          # replay recorded transcripts
+    python bench_kernel.py --turns 500 --library-notes 20000 --history 5000
+    python bench_kernel.py --json results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import kernel
+from fact_engine import FactEngine
+from tracing import TRACER
+
+
+ARK_DIR = os.path.dirname(os.path.abspath(__file__))
+TRANSCRIPTS = ["brain.json", "brain_data.json"]
+PHASES = ["auto_learn", "save_memory", "library_load", "context_pack", "ollama.chat",
+          "parse_and_execute", "tool_iteration", "turn"]
+
+SYNTHETIC_MESSAGES = [
+    ("My name is Alex and I live in Helsinki.", "Nice to meet you!"),
+    ("I love futsal, what should I train today?", "Try a tempo run.\nREAD: library/notes.txt"),
+    ("Search my notes for squat", "CMD: python librarian.py search \"squat\""),
+    ("What is the release date of GTA 6?", "CMD: python researcher.py search \"GTA 6 release date\""),
+    ("I am 29 years old", "Got it."),
+    ("How was my last workout?", "Let me check.\nREAD: library/workouts.txt\nREAD: library/about_user.txt"),
+]
+WORDS = ("squat deadlift bench futsal sprint recovery protein sleep tempo interval "
+         "mobility shoulder knee hamstring goal plan week session rest").split()
+
+
+class MockLLM:
+    """Stands in for the ollama module; replays scripted replies instantly"""
+
+    def __init__(self):
+        self.replies = []
+
+    def chat(self, model=None, messages=None, stream=False, **kwargs):
+        reply = self.replies.pop(0) if self.replies else "OK."
+        if not stream:
+            return {'message': {'content': reply}}
+        # Token-ish chunks so the streaming tokenizer does real work
+        return iter([{'message': {'content': piece}} for piece in reply.replace("\n", "\n\0").replace(" ", " \0").split("\0")])
+
+
+def load_transcript_turns():
+    """(user message, following AI reply) pairs from the recorded brains"""
+    turns = []
+    for name in TRANSCRIPTS:
+        path = os.path.join(ARK_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+        for entry, reply in zip(history, history[1:] + [None]):
+            if entry.get("role") != "user":
+                continue
+            ai_text = reply["text"] if reply and reply.get("role") == "ai" else "OK."
+            turns.append((entry["text"], ai_text))
+    return turns
+
+
+def build_workspace(root, library_notes, history, seed):
+    """Populate a scratch Ark directory with library files and a memory file"""
+    rng = random.Random(seed)
+    library = os.path.join(root, "library")
+    os.makedirs(library)
+    for src in ("about_user.txt", "notes.txt", "favorites.txt"):
+        path = os.path.join(ARK_DIR, "Library", src)
+        if os.path.exists(path):
+            shutil.copy(path, os.path.join(library, src))
+
+    categories = ["notes", "workouts", "ideas", "nutrition"]
+    files = {c: open(os.path.join(library, f"{c}.txt"), "a", encoding="utf-8") for c in categories}
+    try:
+        for _ in range(library_notes):
+            note = " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 15)))
+            files[rng.choice(categories)].write(f"\n{note}\n")
+    finally:
+        for f in files.values():
+            f.close()
+
+    entries = [{"role": "user" if i % 2 == 0 else "ai",
+                "text": " ".join(rng.choice(WORDS) for _ in range(12)),
+                "time": "2026-01-01T00:00:00"} for i in range(history)]
+    with open(os.path.join(root, kernel.MEMORY_FILE), "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+
+
+def run(turns, library_notes=0, history=0, real_commands=False, seed=7):
+    """
+    Replay turns through kernel.chat_turn and collect span timings
+
+    Returns:
+        Dict with per-phase stats (ms) and end-to-end totals
+    """
+    mock = MockLLM()
+    original_cwd = os.getcwd()
+    original = (kernel.ollama, kernel.run_command, kernel.FACTS)
+    capacity = TRACER.spans.maxlen
+    scratch = tempfile.mkdtemp(prefix="ark_bench_")
+    try:
+        build_workspace(scratch, library_notes, history, seed)
+        os.chdir(scratch)
+        kernel.ollama = mock
+        kernel.FACTS = FactEngine(os.path.join("library", "about_user.txt"))
+        if not real_commands:
+            kernel.run_command = lambda command: f"(benchmark) skipped: {command}\n[exit 0 in 0.00s]"
+        TRACER.clear()
+        TRACER.set_capacity(None)  # the rolling buffer would drop the earliest turns of a long run
+
+        wall = []
+        for user_text, ai_text in turns:
+            # Tool iterations ask the model again; the follow-up reply ends the turn
+            mock.replies = [ai_text, "Done."]
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                kernel.chat_turn(user_text)
+            wall.append(time.perf_counter() - started)
+    finally:
+        os.chdir(original_cwd)
+        kernel.ollama, kernel.run_command, kernel.FACTS = original
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    summary = TRACER.percentiles(PHASES)
+    TRACER.clear()
+    TRACER.set_capacity(capacity)
+    for name in ("turn", "auto_learn"):
+        count = summary.get(name, {}).get("count", 0)
+        assert count == len(turns), f"{name}: {count} spans for {len(turns)} turns"
+    phases = {}
+    for name, stats in summary.items():
+        phases[name] = {key: (value * 1000 if key != "count" else value) for key, value in stats.items()}
+    return {
+        "turns": len(turns),
+        "library_notes": library_notes,
+        "history": history,
+        "phases_ms": phases,
+        "turn_mean_ms": statistics.mean(wall) * 1000 if wall else 0.0,
+        "total_s": sum(wall),
+    }
+
+
+def print_report(result):
+    print(f"Replayed {result['turns']} turns | library notes: {result['library_notes']} "
+          f"| history entries: {result['history']}")
+    print(f"{'PHASE':<20}{'COUNT':>7}{'P50 ms':>10}{'P95 ms':>10}{'MAX ms':>10}")
+    for name in PHASES:
+        stats = result["phases_ms"].get(name)
+        if stats:
+            print(f"{name:<20}{stats['count']:>7}{stats['p50']:>10.3f}{stats['p95']:>10.3f}{stats['max']:>10.3f}")
+    print(f"Mean kernel overhead per turn: {result['turn_mean_ms']:.3f} ms "
+          f"(total {result['total_s']:.3f} s, model time excluded)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay conversations through the kernel with a mock LLM")
+    parser.add_argument("--turns", type=int, default=0, help="Replay this many turns (cycles transcripts plus synthetic turns)")
+    parser.add_argument("--library-notes", type=int, default=0, help="Synthetic notes added to the library")
+    parser.add_argument("--history", type=int, default=0, help="Synthetic entries pre-loaded into brain.json")
+    parser.add_argument("--real-commands", action="store_true", help="Actually execute CMD directives")
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    turns = load_transcript_turns()
+    if args.turns:
+        pool = turns + SYNTHETIC_MESSAGES
+        turns = [pool[i % len(pool)] for i in range(args.turns)]
+    elif not turns:
+        turns = list(SYNTHETIC_MESSAGES)
+
+    result = run(turns, args.library_notes, args.history, args.real_commands)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
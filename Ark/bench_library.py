@@ -0,0 +1,160 @@
+"""
+Library Benchmark - Search latency over synthetic librarian libraries
+
+Builds throwaway libraries of generated notes in a scratch directory (the
+real library/ is never touched) and times the librarian's search paths.
+
+Usage:
+    python bench_library.py semantic                    # 10k and 100k notes
+    python bench_library.py semantic --sizes 5000 --queries 100 --ollama
+    python bench_library.py scan                        # mmap scan vs readlines() MB/s
+    python bench_library.py scan --notes 500000 --workers 1 2 4 8
+"""
+
+import argparse
+import glob
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from library_index import LibraryIndex
+
+
+WORDS = ("squat deadlift bench futsal sprint recovery protein sleep tempo interval mobility "
+         "shoulder knee hamstring goal plan week session rest dog cat pizza blue password "
+         "coffee morning evening stretch calf ankle game team coach drill pace heart").split()
+CATEGORIES = ["notes", "training", "food", "ideas", "health", "misc"]
+
+
+def make_library(directory, count, seed=0):
+    """Write count notes of 6-14 random words spread over CATEGORIES"""
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    files = {category: open(os.path.join(directory, category + ".txt"), "w", encoding="utf-8")
+             for category in CATEGORIES}
+    try:
+        for _ in range(count):
+            note = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14)))
+            files[rng.choice(CATEGORIES)].write(f"\n{note}\n")
+    finally:
+        for f in files.values():
+            f.close()
+
+
+def make_queries(count, seed=1):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))) for _ in range(count)]
+
+
+def latency_row(label, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return f"{label:<28}{statistics.median(timings) * 1000:>10.2f}{p95 * 1000:>10.2f}{timings[-1] * 1000:>10.2f}"
+
+
+def bench_semantic(args):
+    from semantic_index import HashingEmbedder, SemanticIndex, default_embedder
+
+    print(f"{'NOTES / PHASE':<28}{'P50 ms':>10}{'P95 ms':>10}{'MAX ms':>10}")
+    for size in args.sizes:
+        scratch = tempfile.mkdtemp(prefix="ark_bench_library_")
+        try:
+            make_library(scratch, size)
+            index = LibraryIndex(scratch)
+            index.refresh()
+            embedder = default_embedder() if args.ollama else HashingEmbedder()
+
+            started = time.perf_counter()
+            semantic = SemanticIndex(scratch, embedder)
+            embedded = semantic.sync(index)
+            build = time.perf_counter() - started
+
+            started = time.perf_counter()
+            SemanticIndex(scratch, embedder)
+            reload = time.perf_counter() - started
+
+            timings = []
+            for query in make_queries(args.queries):
+                started = time.perf_counter()
+                semantic.search(query, k=args.k)
+                timings.append(time.perf_counter() - started)
+
+            megabytes = semantic.matrix.nbytes / 1e6
+            print(f"{size} notes ({embedder.name}, {semantic.matrix.shape[1]} dims, {megabytes:.1f} MB)")
+            print(f"  embed {embedded} notes: {build:.2f} s ({embedded / build:,.0f} notes/s), reload {reload * 1000:.1f} ms")
+            print(latency_row(f"  query top-{args.k}", timings))
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+def readlines_search(library_dir, query):
+    """The librarian's original scan: readlines() + lower() on every line of every file"""
+    query_lower = query.lower()
+    hits = []
+    for filepath in glob.glob(os.path.join(library_dir, "*.txt")):
+        with open(filepath, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        hits.extend(line.strip() for line in lines if query_lower in line.lower() and line.strip())
+    return hits
+
+
+def best_of(runs, func):
+    """(fastest seconds, result) over runs calls"""
+    best, result = None, None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_scan(args):
+    import librarian
+
+    scratch = tempfile.mkdtemp(prefix="ark_bench_library_")
+    try:
+        make_library(scratch, args.notes)
+        megabytes = sum(os.path.getsize(p) for p in glob.glob(os.path.join(scratch, "*.txt"))) / 1e6
+        librarian.LIBRARY_DIR = scratch
+        print(f"{args.notes} notes in {len(CATEGORIES)} files, {megabytes:.1f} MB (page cache warm, best of {args.runs})")
+        print(f"{'METHOD':<28}{'SECONDS':>10}{'MB/s':>10}{'HITS':>10}")
+        for query in args.queries:
+            readlines_search(scratch, query)  # warm the page cache
+            seconds, hits = best_of(args.runs, lambda: readlines_search(scratch, query))
+            print(f"'{query}'")
+            print(f"{'  readlines() loop':<28}{seconds:>10.3f}{megabytes / seconds:>10.0f}{len(hits):>10}")
+            for workers in args.workers:
+                seconds, hits = best_of(args.runs, lambda: list(librarian.scan_notes(query, workers)))
+                print(f"{f'  mmap scan, {workers} threads':<28}{seconds:>10.3f}{megabytes / seconds:>10.0f}{len(hits):>10}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark librarian search")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    semantic = commands.add_parser("semantic", help="Embedding search latency")
+    semantic.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    semantic.add_argument("--queries", type=int, default=50)
+    semantic.add_argument("-k", type=int, default=5)
+    semantic.add_argument("--ollama", action="store_true", help="Use Ollama embeddings if available")
+    semantic.set_defaults(run=bench_semantic)
+
+    scan = commands.add_parser("scan", help="Index-free scan throughput")
+    scan.add_argument("--notes", type=int, default=300_000)
+    scan.add_argument("--queries", nargs="+", default=["hamstring stretch", "password", "zzz"])
+    scan.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    scan.add_argument("--runs", type=int, default=3)
+    scan.set_defaults(run=bench_scan)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
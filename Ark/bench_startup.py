@@ -0,0 +1,92 @@
+"""
+Startup Benchmark - Time-to-prompt and import cost of the Ark entry points
+
+Measures how long `python kernel.py` takes until the "YOU >>" prompt is
+printed (the REPL budget is 100 ms), compared with a bare interpreter, and
+lists the slowest imports from `python -X importtime`.
+
+Usage:
+    python bench_startup.py             # kernel.py, 10 runs
+    python bench_startup.py --runs 20 --top 15 --entry async_kernel.py
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+ARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BUDGET_MS = 100.0
+PROMPT = b"YOU >>"
+
+
+def time_to_prompt(entry, timeout=30.0):
+    """Seconds from spawn until the REPL prompt appears on stdout"""
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-u", entry], cwd=ARK_DIR,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    seen = b""
+    try:
+        while PROMPT not in seen:
+            chunk = proc.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"{entry} exited before showing a prompt")
+            seen += chunk
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"{entry} showed no prompt within {timeout}s")
+        return time.perf_counter() - started
+    finally:
+        try:
+            proc.communicate(b"exit\n", timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def bare_interpreter():
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    return time.perf_counter() - started
+
+
+def import_profile(module, top):
+    """(cumulative_us, self_us, name) of the slowest imports, from -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ARK_DIR, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Ark start-up time")
+    parser.add_argument("--entry", default="kernel.py", help="Entry script to time")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    bare = statistics.median(bare_interpreter() for _ in range(args.runs)) * 1000
+    prompt = [time_to_prompt(args.entry) * 1000 for _ in range(args.runs)]
+    median = statistics.median(prompt)
+
+    print(f"Bare interpreter:        {bare:7.1f} ms")
+    print(f"{args.entry} to prompt:   {median:7.1f} ms median, {max(prompt):.1f} ms max ({args.runs} runs)")
+    print(f"Kernel overhead:         {median - bare:7.1f} ms")
+    print(f"Budget ({BUDGET_MS:.0f} ms):          {'PASS' if median <= BUDGET_MS else 'OVER'}")
+
+    module = os.path.splitext(args.entry)[0]
+    print(f"\nSlowest imports for '{module}' (python -X importtime):")
+    print(f"{'CUMULATIVE ms':>14}{'SELF ms':>10}  MODULE")
+    for cumulative, own, name in import_profile(module, args.top):
+        print(f"{cumulative / 1000:>14.1f}{own / 1000:>10.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Command Runner - Bounded shell execution for kernel tools
+
+Runs a shell command with a wall-clock timeout and reads stdout/stderr
+incrementally, keeping only the head and tail of each stream so a chatty
+or hung command cannot block the REPL or flood the prompt.
+"""
+
+import collections
+import os
+import signal
+import subprocess
+import threading
+import time
+from typing import NamedTuple
+
+
+DEFAULT_TIMEOUT = 60.0      # seconds
+DEFAULT_MAX_BYTES = 8000    # per stream, split between head and tail
+READ_CHUNK = 4096
+
+
+class CommandResult(NamedTuple):
+    """Outcome of a bounded command run"""
+    stdout: str
+    stderr: str
+    exit_code: int
+    runtime: float
+    timed_out: bool
+    dropped_bytes: int
+
+    @property
+    def output(self) -> str:
+        """stdout followed by stderr, like the old capture_output behaviour"""
+        return self.stdout + self.stderr
+
+    def summary(self) -> str:
+        """One-line status for the LLM: exit status, runtime and truncation"""
+        status = "TIMED OUT" if self.timed_out else f"exit {self.exit_code}"
+        line = f"[{status} in {self.runtime:.2f}s"
+        if self.dropped_bytes:
+            line += f", {self.dropped_bytes} bytes truncated"
+        return line + "]"
+
+
+class _HeadTailBuffer:
+    """Keeps the first and last bytes of a stream, counting what is dropped"""
+
+    def __init__(self, max_bytes: int):
+        self.head_limit = max_bytes // 2
+        self.tail_limit = max_bytes - self.head_limit
+        self.head = bytearray()
+        self.tail = collections.deque()
+        self.tail_size = 0
+        self.dropped = 0
+
+    def feed(self, data: bytes):
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+        self.tail.append(data)
+        self.tail_size += len(data)
+        while self.tail and self.tail_size - len(self.tail[0]) >= self.tail_limit:
+            self.dropped += len(self.tail[0])
+            self.tail_size -= len(self.tail.popleft())
+
+    def text(self) -> str:
+        tail = b"".join(self.tail)
+        if len(tail) > self.tail_limit:
+            self.dropped += len(tail) - self.tail_limit
+            tail = tail[-self.tail_limit:]
+            self.tail = collections.deque([tail])
+            self.tail_size = len(tail)
+        head = self.head.decode("utf-8", errors="replace")
+        tail = tail.decode("utf-8", errors="replace")
+        if self.dropped:
+            return f"{head}\n... [{self.dropped} bytes truncated] ...\n{tail}"
+        return head + tail
+
+
+def _pump(stream, buffer: _HeadTailBuffer):
+    """Reader thread: drain a pipe into a bounded buffer"""
+    try:
+        while True:
+            data = stream.read1(READ_CHUNK) if hasattr(stream, "read1") else stream.read(READ_CHUNK)
+            if not data:
+                break
+            buffer.feed(data)
+    except (OSError, ValueError):
+        pass
+    finally:
+        stream.close()
+
+
+def _kill_tree(proc: subprocess.Popen):
+    """Kill the shell and everything it spawned"""
+    try:
+        if os.name == "nt":
+            subprocess.run(f"taskkill /T /F /PID {proc.pid}", shell=True, capture_output=True)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        proc.kill()
+
+
+def run_bounded(command: str, timeout: float = DEFAULT_TIMEOUT,
+                max_bytes: int = DEFAULT_MAX_BYTES, cwd=None) -> CommandResult:
+    """
+    Run a shell command with a timeout and capped output
+
+    Args:
+        command: Shell command line
+        timeout: Wall-clock limit in seconds
+        max_bytes: Bytes kept per stream (head + tail)
+        cwd: Working directory (default: current)
+
+    Returns:
+        CommandResult with truncated output, exit code and runtime
+    """
+    started = time.perf_counter()
+    kwargs = {}
+    if os.name != "nt":
+        kwargs["start_new_session"] = True  # lets a timeout kill the whole group
+    proc = subprocess.Popen(command, shell=True, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            cwd=cwd, **kwargs)
+
+    buffers = (_HeadTailBuffer(max_bytes), _HeadTailBuffer(max_bytes))
+    readers = [threading.Thread(target=_pump, args=(pipe, buf), daemon=True)
+               for pipe, buf in zip((proc.stdout, proc.stderr), buffers)]
+    for reader in readers:
+        reader.start()
+
+    timed_out = False
+    try:
+        exit_code = proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        _kill_tree(proc)
+        exit_code = proc.wait()
+
+    for reader in readers:
+        reader.join(timeout=1.0)
+
+    stdout, stderr = (buf.text() for buf in buffers)
+    return CommandResult(
+        stdout=stdout,
+        stderr=stderr,
+        exit_code=exit_code,
+        runtime=time.perf_counter() - started,
+        timed_out=timed_out,
+        dropped_bytes=sum(buf.dropped for buf in buffers),
+    )
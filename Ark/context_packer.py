@@ -0,0 +1,133 @@
+"""
+Context Packer - Keeps kernel prompts inside the model's context window
+
+Estimates tokens per message and enforces a budget before each model call:
+repeated tool output is replaced by a short reference, large tool output
+keeps only its head and tail, and if the prompt is still too big the oldest
+tool rounds are compressed harder and finally dropped.
+"""
+
+import hashlib
+from typing import Dict, List
+
+
+CHARS_PER_TOKEN = 4        # rough average for English text with llama tokenizers
+MESSAGE_OVERHEAD = 4       # role markers and separators per message
+TOOL_PREFIX = "Tool execution completed:"
+
+TOOL_RESULTS = 'tool_results'  # message key holding one result per directive (never sent to the model)
+
+
+def tool_message(results: List[str], instruction: str = "") -> Dict:
+    """
+    User message feeding tool results back to the model
+
+    The per-directive results ride along under TOOL_RESULTS, so the packer
+    dedupes and trims whole results and never has to split the payload.
+    """
+    content = TOOL_PREFIX + "\n" + "\n".join(results) + instruction
+    return {'role': 'user', 'content': content, TOOL_RESULTS: list(results)}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer needed)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def head_tail(text: str, max_tokens: int) -> str:
+    """Keep the start and end of text so it fits max_tokens"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    marker = f"\n... [{len(text)} chars omitted] ...\n"  # upper bound on the marker's length
+    keep = max(((max_tokens - 1) * CHARS_PER_TOKEN - len(marker)) // 2, 1)
+    dropped = len(text) - 2 * keep
+    return f"{text[:keep]}\n... [{dropped} chars omitted] ...\n{text[-keep:]}"
+
+
+class ContextPacker:
+    """
+    Token-budgeted message packer
+
+    The original message list is never modified; pack() returns a copy.
+    """
+
+    def __init__(self, context_tokens: int = 8192, reply_tokens: int = 1024,
+                 max_block_tokens: int = 600):
+        """
+        Initialize packer
+
+        Args:
+            context_tokens: Model context window (num_ctx)
+            reply_tokens: Room left for the model's answer
+            max_block_tokens: Cap for a single tool result block
+        """
+        self.context_tokens = context_tokens
+        self.reply_tokens = reply_tokens
+        self.max_block_tokens = max_block_tokens
+        self.last_stats: Dict[str, int] = {}
+
+    @property
+    def budget(self) -> int:
+        return self.context_tokens - self.reply_tokens
+
+    def count(self, messages: List[Dict]) -> int:
+        return sum(estimate_tokens(m['content']) + MESSAGE_OVERHEAD for m in messages)
+
+    def _pack_tool_message(self, message: Dict, seen: set, block_cap: int) -> Dict:
+        """Dedupe and compress the per-directive results of one tool-output message"""
+        results = message[TOOL_RESULTS]
+        raw_length = len(TOOL_PREFIX) + 1 + len("\n".join(results))
+        instruction = message['content'][raw_length:]
+        blocks = []
+        for result in results:
+            digest = hashlib.blake2b(result.strip().encode('utf-8'), digest_size=8).digest()
+            if digest in seen:
+                first_line = (result.strip().splitlines() or [""])[0][:60]
+                blocks.append(f"[same output as earlier: {first_line}]")
+                continue
+            seen.add(digest)
+            blocks.append(head_tail(result, block_cap))
+        return {'role': message['role'], 'content': TOOL_PREFIX + "\n" + "\n".join(blocks) + instruction}
+
+    def pack(self, messages: List[Dict]) -> List[Dict]:
+        """
+        Fit messages into the budget
+
+        Args:
+            messages: Chat messages (system first, latest user message last)
+
+        Returns:
+            New message list within budget where possible
+        """
+        before = self.count(messages)
+        block_cap = self.max_block_tokens
+        packed = self._pack_all(messages, block_cap)
+
+        # Still too big: squeeze tool output harder, then drop oldest rounds
+        while self.count(packed) > self.budget and block_cap > 50:
+            block_cap //= 2
+            packed = self._pack_all(messages, block_cap)
+        kept = list(messages)
+        while self.count(packed) > self.budget and len(kept) > 4:
+            del kept[2:4]  # oldest assistant reply + its tool output (keep the question)
+            # Re-pack so "same output as earlier" only points at blocks still in the prompt
+            packed = self._pack_all(kept, block_cap)
+        if self.count(packed) > self.budget:
+            # Last resort: trim the system prompt's saved info
+            others = self.count(packed[1:])
+            system = dict(packed[0])
+            system['content'] = head_tail(system['content'], max(self.budget - others - MESSAGE_OVERHEAD, 100))
+            packed[0] = system
+
+        self.last_stats = {'before': before, 'after': self.count(packed),
+                           'budget': self.budget, 'messages': len(packed)}
+        return packed
+
+    def _pack_all(self, messages: List[Dict], block_cap: int) -> List[Dict]:
+        seen = set()
+        packed = []
+        for message in messages:
+            if TOOL_RESULTS in message:
+                message = self._pack_tool_message(message, seen, block_cap)
+            packed.append(message)
+        return packed
@@ -0,0 +1,205 @@
+"""
+Fact Engine - Personal fact extraction for the kernel
+
+Detects personal facts ("my name is ...", "i live in ...") in user messages
+and keeps them in library/about_user.txt.
+
+The fact file is loaded once into a key -> fact table, so duplicate checks and
+updates are dictionary lookups instead of rescans of the file.
+"""
+
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from file_lock import atomic_write, locked
+
+
+# (pattern, key template, fact template)
+# Single-valued keys ("name", "lives in") are updated in place when a new
+# value arrives. Multi-valued facts ("likes pizza") use the fact itself as key.
+FACT_PATTERNS: List[Tuple[str, str, str]] = [
+    (r"my name is (\w+)", "name", "name is {0}"),
+    (r"i work (?:at|for) (.+?)(?:\.|$|,)", "works at", "works at {0}"),
+    (r"i live in (.+?)(?:\.|$|,)", "lives in", "lives in {0}"),
+    (r"i like (.+?)(?:\.|$|,)", "likes {0}", "likes {0}"),
+    (r"i love (.+?)(?:\.|$|,)", "loves {0}", "loves {0}"),
+    (r"i hate (.+?)(?:\.|$|,)", "hates {0}", "hates {0}"),
+    (r"my favorite (\w+) is (.+?)(?:\.|$|,)", "favorite {0}", "favorite {0} is {1}"),
+    (r"my (\w+) is named (\w+)", "{0} name", "{0} is named {1}"),
+    (r"i have (?:a |an )?(\w+) named (\w+)", "{0} name", "has {0} named {1}"),
+    (r"my birthday is (.+?)(?:\.|$|,)", "birthday", "birthday is {0}"),
+    (r"i am (\d+) years old", "age", "is {0} years old"),
+    (r"i'm (\d+) years old", "age", "is {0} years old"),
+]
+
+# Every pattern needs at least one of these words, so messages without any
+# of them skip the regex entirely.
+TRIGGER_WORDS = ("name", "work", "live", "like", "love", "hate",
+                 "favorite", "birthday", "years old")
+
+
+def _compile_patterns(patterns):
+    """Precompile each pattern with its key and fact templates"""
+    return [(re.compile(pattern, re.IGNORECASE), key_template, fact_template)
+            for pattern, key_template, fact_template in patterns]
+
+
+def _compile_fact_readers(patterns):
+    """Regexes that map a stored fact line back to its key"""
+    readers = []
+    for _, key_template, fact_template in patterns:
+        reader = re.escape(fact_template)
+        for n in range(fact_template.count("{")):
+            reader = reader.replace(re.escape("{%d}" % n), "(.+?)")
+        readers.append((re.compile(f"^{reader}$"), key_template))
+    return readers
+
+
+FACT_REGEXES = _compile_patterns(FACT_PATTERNS)
+FACT_READERS = _compile_fact_readers(FACT_PATTERNS)
+
+
+def fact_key(fact: str) -> str:
+    """Key for a stored fact line (the line itself if it is free-form)"""
+    for reader, key_template in FACT_READERS:
+        match = reader.match(fact)
+        if match:
+            return key_template.format(*match.groups())
+    return fact
+
+
+def extract_facts(text: str) -> List[Tuple[str, str]]:
+    """
+    Extract (key, fact) pairs from a message
+
+    Each pattern is matched on its own: facts may nest inside another
+    pattern's lazy span ("i live in helsinki and i like pizza").
+
+    Args:
+        text: Raw user message
+
+    Returns:
+        Facts in the order they appear in the message
+    """
+    text = text.lower().strip()
+    if not any(word in text for word in TRIGGER_WORDS):
+        return []
+
+    found = []
+    for index, (regex, key_template, fact_template) in enumerate(FACT_REGEXES):
+        for match in regex.finditer(text):
+            groups = match.groups()
+            found.append((match.start(), index, key_template.format(*groups), fact_template.format(*groups)))
+    found.sort()
+    return [(key, fact) for _, _, key, fact in found]
+
+
+class FactEngine:
+    """
+    In-memory fact table backed by a librarian category file
+
+    New facts are appended to the file on flush(); only a changed value for
+    an existing key forces a rewrite.
+    """
+
+    def __init__(self, path: str = os.path.join("library", "about_user.txt")):
+        """
+        Initialize fact engine
+
+        Args:
+            path: Fact file (librarian format, one note per line)
+        """
+        self.path = path
+        self.facts: Dict[str, str] = {}
+        self.pending: List[str] = []
+        self.changed = set()  # keys whose value replaced an existing one
+        self.mtime: Optional[float] = None
+        self.lock = threading.RLock()
+        self.load()
+
+    def _stat(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def _read_table(self) -> Dict[str, str]:
+        facts = {}
+        if not os.path.exists(self.path):
+            return facts
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                fact = line.strip()
+                if fact:
+                    facts[fact_key(fact.lower())] = fact
+        return facts
+
+    def load(self):
+        """(Re)load the fact table from disk"""
+        self.pending = []
+        self.changed = set()
+        self.mtime = self._stat()
+        self.facts = self._read_table()
+
+    def learn(self, text: str) -> List[str]:
+        """
+        Record facts found in a message
+
+        Args:
+            text: Raw user message
+
+        Returns:
+            Facts that were new or changed
+        """
+        extracted = extract_facts(text)
+        if not extracted:
+            return []
+
+        with self.lock:
+            # Pick up edits made outside the engine (e.g. librarian add)
+            if self._stat() != self.mtime and not self.pending and not self.changed:
+                self.load()
+
+            learned = []
+            for key, fact in extracted:
+                current = self.facts.get(key)
+                if current is not None and current.lower() == fact:
+                    continue
+                if current is None:
+                    self.pending.append(fact)
+                else:
+                    self.changed.add(key)
+                self.facts[key] = fact
+                learned.append(fact)
+            return learned
+
+    def flush(self):
+        """Write pending changes (append-only unless a value was replaced)"""
+        with self.lock:
+            if not self.pending and not self.changed:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            # The librarian or another kernel may write the same file
+            with locked(self.path):
+                if self.changed:
+                    # Merge over what is on disk now so concurrent additions survive
+                    current = self._read_table()
+                    for key in self.changed:
+                        current[key] = self.facts[key]
+                    for fact in self.pending:
+                        current[fact_key(fact.lower())] = fact
+                    atomic_write(self.path, "".join(f"{fact}\n" for fact in current.values()))
+                    self.facts = current
+                else:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        for fact in self.pending:
+                            f.write(f"\n{fact}\n")
+                self.mtime = self._stat()
+
+            self.pending = []
+            self.changed = set()
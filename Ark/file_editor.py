@@ -0,0 +1,79 @@
+"""
+File Editor - Atomic, streaming find/replace for kernel UPDATE directives
+
+Locates the target text through mmap (the file is never loaded whole),
+streams the edited copy into a temp file next to the original and swaps it
+in with os.replace, so a crash mid-write leaves the old file untouched.
+"""
+
+import mmap
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Tuple
+
+
+COPY_CHUNK = 1 << 20  # bytes copied per write between replacements
+
+
+def find_offsets(mm, needle: bytes, count: Optional[int] = None) -> List[int]:
+    """Byte offsets of non-overlapping occurrences of needle"""
+    offsets = []
+    position = mm.find(needle)
+    while position != -1 and (count is None or len(offsets) < count):
+        offsets.append(position)
+        position = mm.find(needle, position + len(needle))
+    return offsets
+
+
+def replace_in_file(path: str, old: str, new: str, count: Optional[int] = None,
+                    encoding: str = 'utf-8') -> List[Tuple[int, int]]:
+    """
+    Replace occurrences of old with new, atomically
+
+    Args:
+        path: File to edit
+        old: Text to find (must be non-empty)
+        new: Replacement text
+        count: Maximum replacements (None = all)
+        encoding: File encoding
+
+    Returns:
+        (start, end) byte ranges of the replaced text in the original file;
+        empty if old was not found (the file is left untouched)
+    """
+    needle = old.encode(encoding)
+    replacement = new.encode(encoding)
+    if not needle:
+        raise ValueError("old text must not be empty")
+    if os.path.getsize(path) == 0:
+        return []
+
+    directory = os.path.dirname(os.path.abspath(path))
+    with open(path, 'rb') as src, mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offsets = find_offsets(mm, needle, count)
+        if not offsets:
+            return []
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".edit_", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                cursor = 0
+                for offset in offsets + [len(mm)]:
+                    while cursor < offset:
+                        end = min(offset, cursor + COPY_CHUNK)
+                        out.write(mm[cursor:end])
+                        cursor = end
+                    if offset < len(mm):
+                        out.write(replacement)
+                        cursor = offset + len(needle)
+                out.flush()
+                os.fsync(out.fileno())
+            shutil.copymode(path, tmp_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    # The mmap must be closed before replacing (required on Windows)
+    os.replace(tmp_path, path)
+    return [(offset, offset + len(needle)) for offset in offsets]
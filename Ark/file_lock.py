@@ -0,0 +1,86 @@
+"""
+File Lock - Cross-process locking for Ark's shared stores
+
+brain.json and library/*.txt are written by the kernels, the librarian CLI
+and the kernel server, often from separate processes. Writers hold an OS
+lock on a sidecar "<file>.lock" for the short read-modify-write window so
+concurrent sessions never lose each other's entries.
+"""
+
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+def _read_umask():
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+UMASK = _read_umask()  # read once: os.umask() can only be queried by changing it, which races other threads
+
+
+def _acquire(fd):
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)  # retries internally for ~10s
+                return
+            except OSError:
+                time.sleep(0.01)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+
+def _release(fd):
+    if os.name == "nt":
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def locked(path):
+    """Hold an exclusive cross-process lock for path while the block runs"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        _acquire(fd)
+        try:
+            yield
+        finally:
+            _release(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, text, encoding='utf-8'):
+    """Write text to a temp file beside path and rename it into place"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600: keep the target's permissions, or use open()'s default for a new file
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        else:
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,243 @@
+"""
+File Reader - Bounded reads for kernel READ directives
+
+Reads only the part of a file the model asked for (a byte window or a line
+range) instead of loading the whole file, searches large files through mmap,
+and keeps a small cache of recent reads that is validated against the
+file's mtime and size.
+"""
+
+import collections
+import mmap
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+
+
+def read_bytes(path: str, offset: int = 0, length: int = 1000) -> Tuple[str, int]:
+    """
+    Read a byte window
+
+    Returns:
+        (text, total file size in bytes)
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    return data.decode('utf-8', errors='replace'), size
+
+
+def read_lines(path: str, start: int, end: int, max_bytes: Optional[int] = None) -> Tuple[str, Optional[int]]:
+    """
+    Read lines start..end (1-based, inclusive) without reading past end
+
+    Returns:
+        (numbered lines, byte offset where the read stopped at max_bytes, or None if it did not)
+    """
+    out = []
+    with open(path, 'rb') as f:
+        for _ in range(max(start - 1, 0)):
+            if not _skip_line(f):
+                return "", None
+        used = 0
+        for n in range(max(start, 1), end + 1):
+            if max_bytes is None:
+                line = f.readline()
+            else:
+                line = f.readline(max_bytes - used + 1)
+                if len(line) > max_bytes - used:  # line does not fit in what is left
+                    kept = line[:max_bytes - used]
+                    if kept:
+                        out.append(f"{n:>6}  {kept.decode('utf-8', errors='replace')}")
+                    return "".join(out), f.tell() - len(line) + len(kept)
+                used += len(line)
+            if not line:
+                break
+            out.append(f"{n:>6}  {line.decode('utf-8', errors='replace')}")
+    return "".join(out), None
+
+
+def _skip_line(f, chunk_size: int = 1 << 16) -> bool:
+    """Move past one line in bounded chunks; False at end of file"""
+    chunk = f.readline(chunk_size)
+    while chunk and not chunk.endswith(b"\n"):
+        more = f.readline(chunk_size)
+        if not more:
+            return True
+        chunk = more
+    return bool(chunk)
+
+
+def _hit_line(line_no: int, line: bytes, max_line_bytes: Optional[int]) -> str:
+    if max_line_bytes is not None and len(line) > max_line_bytes:
+        line = line[:max_line_bytes] + b" ... [line truncated]"
+    return f"{line_no:>6}  {line.decode('utf-8', errors='replace').rstrip()}"
+
+
+def search_file(path: str, text: str, max_hits: int = 20, max_bytes: Optional[int] = None) -> str:
+    """
+    Case-insensitive search through an mmap'd file; returns numbered matching lines
+
+    ASCII queries run one byte pattern over the whole map. Any other query
+    needs Unicode case folding ("äiti" vs "Äiti"), so the file is decoded and
+    matched a chunk at a time instead. max_bytes caps each returned line and
+    the whole result.
+    """
+    if os.path.getsize(path) == 0:
+        return ""
+    if not text.isascii():
+        return _search_decoded(path, folded_pattern(text), max_hits, max_bytes)
+    pattern = re.compile(re.escape(text.encode('utf-8')), re.IGNORECASE)
+    hits = []
+    total = 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        line_no = 1
+        position = 0  # always a line start
+        while position < len(mm):
+            match = pattern.search(mm, position)
+            if match is None:
+                break
+            line_start = mm.rfind(b"\n", position, match.start()) + 1 or position
+            line_no += mm[position:line_start].count(b"\n")
+            line_end = mm.find(b"\n", match.end())
+            if line_end == -1:
+                line_end = len(mm)
+            stop = line_end if max_bytes is None else min(line_end, line_start + max_bytes + 1)
+            hits.append(_hit_line(line_no, mm[line_start:stop], max_bytes))
+            total += len(hits[-1])
+            # Resume after this line: later hits on the same line are not revisited
+            line_no += 1
+            position = line_end + 1
+            if len(hits) >= max_hits:
+                hits.append(f"... (stopped after {max_hits} matches)")
+                break
+            if max_bytes is not None and total >= max_bytes:
+                hits.append(f"... (stopped after {max_bytes} bytes of matches)")
+                break
+    return "\n".join(hits)
+
+
+def _search_decoded(path: str, pattern, max_hits: int, max_bytes: Optional[int] = None,
+                    chunk_size: int = 4 << 20) -> str:
+    """search_file for a str folded_pattern(): match_lines over newline-aligned chunks"""
+    hits = []
+    total = 0
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        base = 0
+        for start, end in line_chunks(mm, chunk_size):
+            chunk_hits, newlines = match_lines(mm, start, end, pattern)
+            for line_no, line in chunk_hits:
+                hits.append(_hit_line(base + line_no, line, max_bytes))
+                total += len(hits[-1])
+                if len(hits) >= max_hits:
+                    hits.append(f"... (stopped after {max_hits} matches)")
+                    return "\n".join(hits)
+                if max_bytes is not None and total >= max_bytes:
+                    hits.append(f"... (stopped after {max_bytes} bytes of matches)")
+                    return "\n".join(hits)
+            base += newlines
+    return "\n".join(hits)
+
+
+def folded_pattern(text: str):
+    """
+    Precompiled pattern for match_lines()
+
+    ASCII text becomes a byte pattern for already lower-cased data: matching
+    text.lower() against data.lower() is what re.IGNORECASE does for bytes,
+    but keeps the regex engine on its fast literal path. Bytes only fold
+    ASCII, so any other text becomes a Unicode re.IGNORECASE str pattern and
+    match_lines() decodes the data before searching it.
+    """
+    if not text.isascii():
+        return re.compile(re.escape(text), re.IGNORECASE)
+    return re.compile(re.escape(text.lower().encode('utf-8')))
+
+
+def line_chunks(mm, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split a buffer into (start, end) ranges of about chunk_size bytes that end on a newline"""
+    ranges = []
+    start = 0
+    while start < len(mm):
+        end = mm.find(b"\n", min(start + chunk_size, len(mm)) - 1)
+        end = len(mm) if end == -1 else end + 1
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+def match_lines(mm, start: int, end: int, pattern) -> Tuple[List[Tuple[int, bytes]], int]:
+    """
+    Lines of mm[start:end] matching a folded_pattern()
+
+    Returns:
+        ([(line number within the chunk, line bytes)], newlines in the chunk)
+    """
+    data = mm[start:end]
+    if isinstance(pattern.pattern, str):
+        # chunks end on a newline, so decoding one never splits a character
+        data = data.decode('utf-8', errors='replace')
+        folded, newline = data, "\n"
+    else:
+        folded, newline = data.lower(), b"\n"
+    hits = []
+    line_no = 1
+    counted_to = 0
+    position = 0
+    while True:
+        match = pattern.search(folded, position)
+        if match is None:
+            break
+        line_start = folded.rfind(newline, 0, match.start()) + 1
+        line_end = folded.find(newline, match.end())
+        if line_end == -1:
+            line_end = len(folded)
+        line_no += folded.count(newline, counted_to, line_start)
+        counted_to = line_start
+        line = data[line_start:line_end]
+        hits.append((line_no, line.encode('utf-8') if newline == "\n" else line))
+        position = line_end + 1  # next line: one hit per line
+    return hits, folded.count(newline)
+
+
+class ReadCache:
+    """
+    LRU cache of read results keyed by (path, request)
+
+    Entries remember the file's (mtime_ns, size) and are discarded when the
+    file changes, so repeated reads within a tool loop cost one stat().
+    """
+
+    def __init__(self, capacity: int = 32, stats: Optional[dict] = None):
+        self.capacity = capacity
+        self.entries = collections.OrderedDict()
+        self.stats = stats if stats is not None else {'hits': 0, 'misses': 0}
+        self.lock = threading.Lock()
+
+    def get_or_read(self, path: str, request: tuple, reader):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        key = (os.path.abspath(path), request)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+        result = reader()
+        with self.lock:
+            self.entries[key] = (version, result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        return result
+
+    def invalidate(self, path: str):
+        """Drop every cached read of path (called after WRITE/UPDATE)"""
+        target = os.path.abspath(path)
+        with self.lock:
+            for key in [k for k in self.entries if k[0] == target]:
+                del self.entries[key]
@@ -0,0 +1,233 @@
+"""
+HTTP Cache - On-disk page cache for the researcher
+
+Stores the *extracted text* of fetched pages keyed by URL, so a repeat
+`python researcher.py read URL` skips both the download and the HTML parse.
+
+Freshness follows the response headers:
+    Cache-Control: max-age / no-cache / no-store, else Expires,
+    else 10% of the time since Last-Modified (capped at a day),
+    else DEFAULT_TTL.
+Stale entries are revalidated with If-None-Match / If-Modified-Since; a 304
+just renews them. Entries are evicted least-recently-used once the cache
+exceeds its size cap; the total size is tracked as entries are written, so
+the directory is only scanned when something has to go. In offline mode
+only cached text is served.
+
+Layout: cache/pages/<sha256(url)>.json, one entry per file, mtime = last use.
+"""
+
+import email.utils
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+from file_lock import atomic_write
+
+
+CACHE_DIR = os.path.join("cache", "pages")
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+DEFAULT_TTL = 3600          # seconds, when the server gives no freshness information
+MAX_HEURISTIC_TTL = 86400   # cap for the Last-Modified heuristic
+
+
+class Fetched(NamedTuple):
+    """What a fetcher returns: status code, response headers, extracted text (None for 304)"""
+    status: int
+    headers: Dict[str, str]
+    text: Optional[str]
+
+
+class CachedPage(NamedTuple):
+    text: str
+    source: str   # fresh | revalidated | fetched | stale | uncached
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def freshness(headers: Dict[str, str], now: float) -> Optional[float]:
+    """
+    Seconds a response stays fresh (0 = revalidate every time), or None if it must not be stored
+    """
+    headers = {k.lower(): v for k, v in headers.items()}
+    directives = {}
+    for part in headers.get("cache-control", "").lower().split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name] = value.strip('"')
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    if "max-age" in directives:
+        try:
+            return max(0.0, float(directives["max-age"]))
+        except ValueError:
+            return 0.0
+    expires = _parse_date(headers.get("expires"))
+    if expires is not None:
+        served = _parse_date(headers.get("date")) or now
+        return max(0.0, expires - served)
+    last_modified = _parse_date(headers.get("last-modified"))
+    if last_modified is not None:
+        return min(MAX_HEURISTIC_TTL, max(0.0, (now - last_modified) * 0.1))
+    return float(DEFAULT_TTL)
+
+
+class PageCache:
+    """
+    URL -> extracted text cache with HTTP validation and LRU eviction
+
+    Args:
+        directory: Where entries are stored
+        max_bytes: Size cap; least recently used entries are evicted past it
+        stats: Dict to count hits/misses in (e.g. one registered in kernel.CACHE_STATS)
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES,
+                 stats: Optional[dict] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.stats = stats if stats is not None else {'hits': 0, 'misses': 0}
+        self.lock = threading.RLock()   # serialises stores and eviction across fetch threads
+        self.total: Optional[int] = None   # bytes on disk, measured on the first store
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    def _store(self, url: str, entry: dict):
+        path = self._path(url)
+        data = json.dumps(entry)
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            replaced = self._file_size(path)
+            atomic_write(path, data)
+            if self.total is None:
+                self.total = self.size()
+            else:
+                self.total += self._file_size(path) - replaced
+            if self.total > self.max_bytes:
+                self.evict()
+
+    def _touch(self, url: str):
+        try:
+            os.utime(self._path(url))  # mtime doubles as the LRU clock
+        except OSError:
+            pass
+
+    def _entries(self):
+        """(mtime, size, path) of every entry; files removed mid-scan are skipped"""
+        try:
+            scan = list(os.scandir(self.directory))
+        except OSError:
+            return []
+        entries = []
+        for e in scan:
+            if not e.name.endswith(".json"):
+                continue
+            try:
+                stat = e.stat()
+            except OSError:
+                continue  # deleted by another process since the scan
+            entries.append((stat.st_mtime, stat.st_size, e.path))
+        return entries
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        with self.lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    continue
+                total -= size
+            self.total = total
+
+    def get(self, url: str, fetch: Callable[[Dict[str, str]], Fetched], offline: bool = False) -> CachedPage:
+        """
+        Cached text for url, fetching or revalidating when needed
+
+        Args:
+            url: Page URL (the cache key)
+            fetch: Called with extra request headers (conditional GET); returns Fetched
+            offline: Never touch the network; serve whatever is cached
+
+        Returns:
+            CachedPage; source "uncached" (empty text) only in offline mode
+        """
+        now = time.time()
+        entry = self.load(url)
+        if entry is not None:
+            fresh = now - entry["fetched"] < entry["max_age"]
+            if fresh or offline:
+                with self.lock:
+                    self.stats['hits'] += 1
+                self._touch(url)
+                return CachedPage(entry["text"], "fresh" if fresh else "stale")
+        if offline:
+            return CachedPage("", "uncached")
+
+        with self.lock:
+            self.stats['misses'] += 1
+        conditional = {}
+        if entry is not None:
+            if entry.get("etag"):
+                conditional["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                conditional["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = fetch(conditional)
+        except Exception:
+            if entry is None:
+                raise
+            self._touch(url)
+            return CachedPage(entry["text"], "stale")  # network down: stale beats nothing
+
+        headers = {k.lower(): v for k, v in response.headers.items()}
+        max_age = freshness(headers, now)
+        if response.status == 304 and entry is not None:
+            if max_age is None or not ({"cache-control", "expires"} & headers.keys()):
+                max_age = entry["max_age"]  # a bare 304 keeps the stored freshness lifetime
+            entry.update(fetched=now, max_age=max_age)
+            self._store(url, entry)
+            return CachedPage(entry["text"], "revalidated")
+
+        text = response.text or ""
+        if max_age is not None and 200 <= response.status < 300:
+            self._store(url, {"url": url, "text": text, "fetched": now, "max_age": max_age,
+                              "etag": headers.get("etag"), "last_modified": headers.get("last-modified")})
+        return CachedPage(text, "fetched")
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
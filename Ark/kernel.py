@@ -1,83 +1,89 @@
-import ollama
 import os
-import subprocess
 import datetime
 import json
 import re
 import sys
-import importlib
+import shlex
+import collections
+import time
+import threading
 from colorama import Fore, Style, init
+from fact_engine import FactEngine
+from command_runner import run_bounded
+from tracing import TRACER, span
+from context_packer import ContextPacker, tool_message
+from file_reader import ReadCache, read_bytes, read_lines, search_file
+from file_editor import replace_in_file
+from file_lock import locked, atomic_write
+from researcher import PAGE_CACHE
 
 init(autoreset=True)
 
+# Heavy modules load on first use so the prompt appears fast (see bench_startup.py)
+ollama = None
+
+def _llm():
+    """The ollama client module, imported on first chat"""
+    global ollama
+    if ollama is None:
+        import ollama as client
+        ollama = client
+    return ollama
+
 # --- CONFIGURATION ---
 MODEL = "dolphin-llama3" 
 MEMORY_FILE = "brain.json"
+MAX_TOOL_WORKERS = 4  # Parallel READ/CMD tool calls per reply
+COMMAND_TIMEOUT = 60  # Seconds before a CMD is killed
+COMMAND_OUTPUT_CAP = 8000  # Bytes kept per stream (head + tail)
+CONTEXT_TOKENS = int(os.environ.get("ARK_NUM_CTX", "0")) or None  # num_ctx sent to Ollama; None = ask the model
+MAX_AUTO_CONTEXT = 8192  # cap for the model-reported window (the KV cache grows with num_ctx)
+DEFAULT_CONTEXT = 8192  # used when the model's window can't be read
+READ_LIMIT = 1000  # Bytes returned by a plain READ
+READ_MAX_BYTES = COMMAND_OUTPUT_CAP  # Largest 'bytes' window one READ returns
+READ_MAX_LINES = 200  # Largest 'lines' range one READ returns
+LIBRARY_CONTEXT_CHARS = 4000  # Above this the prompt gets only the top library hits
+LIBRARY_TOP_K = 5
+LIBRARY_ALWAYS_FILE = "about_user.txt"  # Learned user facts are always included
+CACHE_STATS = {}  # cache name -> {'hits': int, 'misses': int}, shown by DIAGNOSE
 PROTECTED_FILES = ['kernel.py', './kernel.py', 'c:\\users\\konst\\desktop\\ark\\kernel.py']
 
 # --- 1. MEMORY SYSTEM ---
-def load_memory():
+def _read_memory():
     if not os.path.exists(MEMORY_FILE): return []
     try:
         with open(MEMORY_FILE, 'r', encoding='utf-8') as f: return json.load(f)
     except: return []
 
+def load_memory():
+    with locked(MEMORY_FILE): return _read_memory()
+
+MEMORY_LOCK = threading.Lock()  # Background jobs and the server save from other threads
+
 def save_memory(role, text):
-    history = load_memory()
-    timestamp = datetime.datetime.now().isoformat()
-    if len(history) > 20: history = history[-20:]
-    history.append({"role": role, "text": text, "time": timestamp})
-    with open(MEMORY_FILE, 'w', encoding='utf-8') as f: json.dump(history, f, indent=2)
+    # Other kernels, the server or the librarian may write concurrently: lock across processes
+    with MEMORY_LOCK, locked(MEMORY_FILE):
+        history = _read_memory()
+        timestamp = datetime.datetime.now().isoformat()
+        if len(history) > 20: history = history[-20:]
+        history.append({"role": role, "text": text, "time": timestamp})
+        atomic_write(MEMORY_FILE, json.dumps(history, indent=2))
 
 def recall_memory(query):
     history = load_memory()
     return history[-5:] if history else []
 
 # --- AUTO-LEARN: Detect and save personal facts ---
+FACTS = FactEngine(os.path.join("library", "about_user.txt"))
+AUTO_FLUSH = True  # False when a background task flushes FACTS instead
+
 def auto_learn(user_input):
     """Automatically detect personal facts and save to memory"""
-    patterns = [
-        (r"my name is (\w+)", "name is {0}"),
-        (r"i work (?:at|for) (.+?)(?:\.|$|,)", "works at {0}"),
-        (r"i live in (.+?)(?:\.|$|,)", "lives in {0}"),
-        (r"i like (.+?)(?:\.|$|,)", "likes {0}"),
-        (r"i love (.+?)(?:\.|$|,)", "loves {0}"),
-        (r"i hate (.+?)(?:\.|$|,)", "hates {0}"),
-        (r"my favorite (\w+) is (.+?)(?:\.|$|,)", "favorite {0} is {1}"),
-        (r"my (\w+) is named (\w+)", "{0} is named {1}"),
-        (r"i have (?:a |an )?(\w+) named (\w+)", "has {0} named {1}"),
-        (r"my birthday is (.+?)(?:\.|$|,)", "birthday is {0}"),
-        (r"i am (\d+) years old", "is {0} years old"),
-        (r"i'm (\d+) years old", "is {0} years old"),
-    ]
-    
-    # Load existing facts to avoid duplicates
-    existing = ""
-    about_file = os.path.join("library", "about_user.txt")
-    if os.path.exists(about_file):
-        with open(about_file, 'r', encoding='utf-8') as f:
-            existing = f.read().lower()
-    
-    text = user_input.lower().strip()
-    learned = []
-    
-    for pattern, template in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            groups = match.groups()
-            fact = template.format(*groups)
-            # Skip if already known
-            if fact.lower() in existing:
-                continue
-            # Save to librarian
-            try:
-                subprocess.run(
-                    f'python librarian.py add "about_user" "{fact}"',
-                    shell=True, capture_output=True, cwd=os.getcwd()
-                )
-                learned.append(fact)
-            except:
-                pass
+    try:
+        learned = FACTS.learn(user_input)
+        if AUTO_FLUSH: FACTS.flush()
+    except Exception:
+        return []
     
     if learned:
         print(f"{Fore.CYAN}[AUTO-LEARNED: {', '.join(learned)}]{Style.RESET_ALL}")
@@ -103,49 +109,155 @@ def write_file(filename, content):
     try:
         if "\\n" in content: content = content.replace("\\n", "\n")
         with open(filename, 'w', encoding='utf-8') as f: f.write(content)
+        READ_CACHE.invalidate(filename)
         return f"SUCCESS: Overwrote {filename}"
     except Exception as e: 
         return f"ERROR: {str(e)}"
 
-def update_file(filename, old_text, new_text):
-    """SCALPEL OPTION: Replaces specific text safely."""
+def update_file(filename, old_text, new_text, count=None):
+    """SCALPEL OPTION: Replaces specific text safely (streamed, written via temp file + rename)."""
     try:
         if not os.path.exists(filename): return f"ERROR: File {filename} not found."
-        with open(filename, 'r', encoding='utf-8') as f: content = f.read()
         
         # Handle escaped newlines in old_text and new_text
         if "\\n" in old_text: old_text = old_text.replace("\\n", "\n")
         if "\\n" in new_text: new_text = new_text.replace("\\n", "\n")
         
-        if old_text not in content:
+        changed = replace_in_file(filename, old_text, new_text, count)
+        if not changed and "\n" in old_text:
+            # Windows files: match CRLF line endings too
+            changed = replace_in_file(filename, old_text.replace("\n", "\r\n"), new_text.replace("\n", "\r\n"), count)
+        if not changed:
             return f"ERROR: old_text not found in file. Text to find: '{old_text[:50]}...'"
             
-        new_content = content.replace(old_text, new_text)
-        with open(filename, 'w', encoding='utf-8') as f: f.write(new_content)
-        return f"SUCCESS: Updated {filename}"
+        READ_CACHE.invalidate(filename)
+        where = ", ".join(f"{start}-{end}" for start, end in changed[:5]) + (" ..." if len(changed) > 5 else "")
+        return f"SUCCESS: Updated {filename} ({len(changed)} replacement{'s' if len(changed) != 1 else ''} at bytes {where})"
     except Exception as e: 
         return f"ERROR: {str(e)}"
 
-def read_file(filename):
+READ_CACHE = ReadCache(stats=CACHE_STATS.setdefault('read_cache', {'hits': 0, 'misses': 0}))
+CACHE_STATS['page_cache'] = PAGE_CACHE.stats  # researcher.py pages, when run in-process
+READ_SPEC_RE = re.compile(r'^(?:(\d+)\s*[-:]\s*(\d+)|(\d+)\s*\+\s*(\d+))$')
+
+def read_file(filename, mode=None, spec=None):
+    """Bounded read: first READ_LIMIT bytes, 'lines A-B', 'bytes OFFSET+LENGTH' or 'find TEXT'."""
     try:
         if not os.path.exists(filename): return f"ERROR: File {filename} not found."
-        with open(filename, 'r', encoding='utf-8') as f: return f.read()
+        mode = (mode or 'bytes').lower()
+        if mode == 'find':
+            result = READ_CACHE.get_or_read(filename, ('find', spec), lambda: search_file(filename, spec, max_bytes=READ_MAX_BYTES))
+            return result or f"No matches for '{spec}'."
+        
+        numbers = READ_SPEC_RE.match(spec.strip()) if spec else None
+        bad_range = f"ERROR: Bad READ range '{spec}'. Use 'lines 10-40' or 'bytes 2000+1000'."
+        if spec and not numbers: return bad_range
+        if mode == 'lines':
+            if not numbers: return bad_range
+            start, end = (int(numbers.group(1)), int(numbers.group(2))) if numbers.group(1) else \
+                (int(numbers.group(3)), int(numbers.group(3)) + int(numbers.group(4)) - 1)
+            if end < start: return bad_range
+            more = ""
+            if end - start + 1 > READ_MAX_LINES:
+                requested_end, end = end, start + READ_MAX_LINES - 1
+                more = f"\n... [capped at {READ_MAX_LINES} lines; READ: {filename} lines {end + 1}-{min(requested_end, end + READ_MAX_LINES)}]"
+            text, stopped = READ_CACHE.get_or_read(filename, ('lines', start, end),
+                                                   lambda: read_lines(filename, start, end, READ_MAX_BYTES))
+            if stopped is not None:
+                remaining = os.path.getsize(filename) - stopped
+                more = f"\n... [{remaining} more bytes; READ: {filename} bytes {stopped}+{READ_MAX_BYTES}]"
+            return text + more if text else text
+        
+        offset, length = 0, READ_LIMIT
+        if numbers:
+            offset, length = (int(numbers.group(1)), int(numbers.group(2)) - int(numbers.group(1))) if numbers.group(1) else \
+                (int(numbers.group(3)), int(numbers.group(4)))
+            if length <= 0: return bad_range
+            length = min(length, READ_MAX_BYTES)
+        text, size = READ_CACHE.get_or_read(filename, ('bytes', offset, length), lambda: read_bytes(filename, offset, length))
+        remaining = size - offset - length
+        if remaining > 0:
+            text += f"\n... [{remaining} more bytes; READ: {filename} bytes {offset + length}+{length}]"
+        return text
     except Exception as e: 
         return f"ERROR: {str(e)}"
 
+# Ark CLIs that run inside the kernel process instead of a fresh interpreter
+IN_PROCESS_TOOLS = {'librarian.py': 'librarian', 'library_db.py': 'library_db', 'researcher.py': 'researcher'}
+# Modes that can outlive COMMAND_TIMEOUT (embedding, bulk writes, many fetches) run as killable subprocesses:
+# a timed-out in-process thread can't be stopped and would keep holding librarian.INDEX_LOCK
+SUBPROCESS_MODES = {'librarian': ('semantic', 'import', 'compact'), 'researcher': ('research',)}
+LIBRARY_LOCK_TIMEOUT = 2.0  # seconds a chat turn waits for the library index before skipping the notes
+PYTHON_NAMES = ('python', 'python3', 'py')
+
+def run_in_process(command):
+    """Run 'python librarian.py ...' / 'python researcher.py ...' in-process. Returns None for other commands."""
+    if any(c in command for c in '|&;<>`$'): return None  # shell features need a real shell
+    try: argv = shlex.split(command)
+    except ValueError: return None
+    if len(argv) < 2: return None
+    interpreter = os.path.basename(argv[0]).lower()
+    if interpreter.endswith('.exe'): interpreter = interpreter[:-4]
+    module_name = IN_PROCESS_TOOLS.get(argv[1].lower().replace('\\', '/').removeprefix('./'))
+    if interpreter not in PYTHON_NAMES or module_name is None: return None
+    if len(argv) > 2 and argv[2].lower() in SUBPROCESS_MODES.get(module_name, ()): return None
+    
+    print(f"{Fore.RED}>>> EXECUTING IN-PROCESS: {command}{Style.RESET_ALL}")
+    started = time.perf_counter()
+    result = {}
+    def target():
+        try:
+            import importlib
+            result['output'] = importlib.import_module(module_name).run(argv[2:])
+        except Exception as e:
+            result['error'] = e
+    # A thread so a hung network call still honours COMMAND_TIMEOUT
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(COMMAND_TIMEOUT)
+    runtime = time.perf_counter() - started
+    if worker.is_alive():
+        return f"[TIMED OUT in {runtime:.2f}s, in-process]"
+    if 'error' in result:
+        return f"EXECUTION ERROR: {result['error']}\n[exit 1 in {runtime:.2f}s, in-process]"
+    output = result['output']
+    if len(output) > COMMAND_OUTPUT_CAP:
+        half = COMMAND_OUTPUT_CAP // 2
+        output = f"{output[:half]}\n... [{len(output) - 2 * half} chars truncated] ...\n{output[-half:]}"
+    return f"{output}\n[exit 0 in {runtime:.2f}s, in-process]"
+
 def run_command(command):
     if "python -c" in command: return "SYSTEM ERROR: 'python -c' is BANNED."
+    in_process = run_in_process(command)
+    if in_process is not None: return in_process
     try:
         print(f"{Fore.RED}>>> EXECUTING TERMINAL: {command}{Style.RESET_ALL}")
-        result = subprocess.run(command, shell=True, capture_output=True, text=True)
-        return result.stdout + result.stderr
+        result = run_bounded(command, timeout=COMMAND_TIMEOUT, max_bytes=COMMAND_OUTPUT_CAP)
+        return f"{result.output}\n{result.summary()}"
     except Exception as e: 
         return f"EXECUTION ERROR: {str(e)}"
 
+def search_notes(query):
+    """/search mode: the query reaches librarian verbatim, so multi-word and "quoted phrase" queries survive"""
+    try:
+        import librarian
+        return librarian.search_notes(query)
+    except Exception as e:
+        return f"ERROR: {str(e)}"
+
+def save_note(info):
+    """/save mode: append info to the notes category"""
+    try:
+        import librarian
+        return librarian.add_note("notes", info)
+    except Exception as e:
+        return f"ERROR: {str(e)}"
+
 def reload_kernel():
     """Hot-reload the kernel without restarting the program"""
     try:
         print(f"{Fore.YELLOW}>>> RELOADING KERNEL...{Style.RESET_ALL}")
+        import importlib
         current_module = sys.modules[__name__]
         importlib.reload(current_module)
         return "SUCCESS: Kernel reloaded successfully"
@@ -162,22 +274,157 @@ def clear_system():
     except Exception as e:
         return f"ERROR: Failed to clear system - {str(e)}"
 
+OLLAMA_URL = "http://localhost:11434"
+OLLAMA_STATUS = {'checked': None, 'reachable': None, 'loaded': [], 'error': None}
+_probe_lock = threading.Lock()
+
+def _probe_ollama():
+    """Background probe: is the server up and which models are loaded in memory"""
+    if not _probe_lock.acquire(blocking=False): return  # a probe is already running
+    try:
+        import urllib.request
+        with urllib.request.urlopen(f"{OLLAMA_URL}/api/ps", timeout=2) as response:
+            models = json.loads(response.read().decode('utf-8')).get('models', [])
+        OLLAMA_STATUS.update(reachable=True, error=None,
+                             loaded=[(m.get('name', '?'), m.get('size_vram', 0)) for m in models])
+    except Exception as e:
+        OLLAMA_STATUS.update(reachable=False, loaded=[], error=str(e))
+    finally:
+        OLLAMA_STATUS['checked'] = time.time()
+        _probe_lock.release()
+
+def context_tokens():
+    """The num_ctx for chat calls: ARK_NUM_CTX, else the model's context_length (capped), read once via /api/show"""
+    global CONTEXT_TOKENS
+    if CONTEXT_TOKENS is None:
+        CONTEXT_TOKENS = DEFAULT_CONTEXT
+        try:
+            import urllib.request
+            request = urllib.request.Request(f"{OLLAMA_URL}/api/show", data=json.dumps({'model': MODEL}).encode('utf-8'),
+                                             headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(request, timeout=5) as response:
+                info = json.loads(response.read().decode('utf-8')).get('model_info', {})
+            lengths = [v for k, v in info.items() if k.endswith('.context_length') and isinstance(v, int)]
+            if lengths: CONTEXT_TOKENS = min(lengths[0], MAX_AUTO_CONTEXT)
+        except Exception:
+            pass
+        PACKER.context_tokens = CONTEXT_TOKENS
+    return CONTEXT_TOKENS
+
+def refresh_ollama_status(max_age=10.0):
+    """Kick off a probe if the cached status is stale; never waits for it"""
+    checked = OLLAMA_STATUS['checked']
+    if checked is None or time.time() - checked > max_age:
+        threading.Thread(target=_probe_ollama, daemon=True).start()
+
+def _windows_rss():
+    """WorkingSetSize from GetProcessMemoryInfo via ctypes (no psutil needed)"""
+    import ctypes
+    from ctypes import wintypes
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+    try:
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32 = ctypes.WinDLL('kernel32')
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        get_info = kernel32.K32GetProcessMemoryInfo  # psapi's GetProcessMemoryInfo, exported by kernel32 since Windows 7
+        get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+        get_info.restype = wintypes.BOOL
+        if not get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb): return None
+        return counters.WorkingSetSize / 1e6
+    except (OSError, AttributeError):
+        return None
+
+def _process_rss():
+    """Resident set size in MB, or None if the platform won't say cheaply"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        pass
+    if os.name == 'nt':
+        rss = _windows_rss()
+        if rss is not None: return rss
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        return None
+
+def _size_of(path):
+    try: return os.path.getsize(path)
+    except OSError: return 0
+
+def _library_index_status():
+    """One DIAGNOSE line on the librarian's token index; never loads or refreshes it"""
+    import librarian
+    if not librarian.USE_INDEX: return "Library index: disabled (ARK_LIBRARY_INDEX=0)"
+    if not librarian.INDEX_LOCK.acquire(blocking=False): return "Library index: busy (search or update running)"
+    try:
+        index = librarian.INDEX
+        if index is None: return "Library index: not loaded yet (built on first search)"
+        fresh = index.is_fresh()
+        return (f"Library index: {index.live_notes} notes, {len(index.postings)} tokens, "
+                f"{'fresh' if fresh else 'STALE (files changed; re-indexed on next search)'}")
+    finally:
+        librarian.INDEX_LOCK.release()
+
 def diagnose_command():
-    """Run comprehensive system diagnostics"""
+    """Run comprehensive system diagnostics (in-memory stats and stat() calls only)"""
     try:
         print(f"{Fore.CYAN}>>> RUNNING DIAGNOSTICS{Style.RESET_ALL}")
+        started = time.perf_counter()
+        refresh_ollama_status()
         report = []
         
         report.append("=== SYSTEM DIAGNOSTICS ===")
         report.append(f"Python: {sys.version.split()[0]}")
         report.append(f"Platform: {os.name}")
         report.append(f"Working Directory: {os.getcwd()}")
+        rss = _process_rss()
+        report.append(f"Process RSS: {rss:.1f} MB" if rss is not None else "Process RSS: unknown")
         
-        if os.path.exists(MEMORY_FILE):
-            history = load_memory()
-            report.append(f"Memory: {len(history)} entries")
+        report.append("\n=== OLLAMA ===")
+        if OLLAMA_STATUS['checked'] is None:
+            report.append("Server: probing... (run DIAGNOSE again)")
         else:
-            report.append("Memory: Empty")
+            age = time.time() - OLLAMA_STATUS['checked']
+            if OLLAMA_STATUS['reachable']:
+                report.append(f"Server: reachable at {OLLAMA_URL} (checked {age:.0f}s ago)")
+                loaded = OLLAMA_STATUS['loaded']
+                names = [name for name, _ in loaded]
+                report.append(f"Loaded models: {', '.join(f'{n} ({v / 1e9:.1f} GB VRAM)' for n, v in loaded) or 'none'}")
+                report.append(f"{MODEL}: {'loaded (warm)' if any(n.split(':')[0] == MODEL for n in names) else 'not loaded (cold start on next chat)'}")
+            else:
+                report.append(f"Server: UNREACHABLE ({OLLAMA_STATUS['error']})")
+        rates = [t for t in TURN_STATS if t.get('tokens_per_s')]
+        if rates:
+            recent = rates[-5:]
+            report.append(f"Generation: {sum(t['tokens_per_s'] for t in recent) / len(recent):.1f} tokens/s (last {len(recent)} replies)")
+            prompt = [t['prompt_tokens_per_s'] for t in recent if t.get('prompt_tokens_per_s')]
+            if prompt: report.append(f"Prompt eval: {sum(prompt) / len(prompt):.1f} tokens/s")
+        if TURN_STATS:
+            last = TURN_STATS[-1]
+            report.append(f"Last reply: first token {last['first_token'] * 1000:.0f} ms, "
+                          f"{last['early_tools']} early tools, {last['overlap'] * 1000:.0f} ms overlapped")
+        
+        report.append("\n=== STORES ===")
+        report.append(f"Memory ({MEMORY_FILE}): {_size_of(MEMORY_FILE) / 1024:.1f} KB")
+        library_dir = "library"
+        if os.path.isdir(library_dir):
+            files = [e for e in os.scandir(library_dir) if e.name.endswith('.txt')]
+            total = sum(e.stat().st_size for e in files)
+            report.append(f"Library: {len(files)} files, {total / 1024:.1f} KB")
+        report.append(_library_index_status())
+        fact_mtime = FACTS._stat()
+        fresh = fact_mtime == FACTS.mtime
+        report.append(f"Fact table: {len(FACTS.facts)} facts, {'fresh' if fresh else 'STALE (file changed on disk)'}"
+                      f"{', unflushed changes' if FACTS.pending or FACTS.changed else ''}")
         
         report.append("\n=== CODE ANALYSIS ===")
         if os.path.exists("kernel.py"):
@@ -185,92 +432,315 @@ def diagnose_command():
                 lines = len(f.readlines())
             report.append(f"kernel.py: {lines} lines")
         
-        try:
-            import ollama
-            report.append("OK: Ollama module available")
-        except ImportError:
-            report.append("MISSING: Ollama module")
+        report.append("\n=== CACHES ===")
+        if not CACHE_STATS: report.append("No caches registered")
+        for name, stats in CACHE_STATS.items():
+            lookups = stats['hits'] + stats['misses']
+            ratio = stats['hits'] / lookups * 100 if lookups else 0.0
+            report.append(f"{name}: {ratio:.0f}% hit ratio ({stats['hits']}/{lookups})")
+        
+        report.append("\n=== SLOWEST RECENT TOOLS ===")
+        slowest = sorted(TOOL_TIMINGS, key=lambda t: -t[2])[:5]
+        if not slowest: report.append("No tools run yet")
+        for kind, target, seconds in slowest:
+            report.append(f"{seconds * 1000:8.1f} ms  {kind} {target[:50]}")
         
+        report.append("\n=== PHASE LATENCY ===")
+        report.append(TRACER.report())
+        
+        report.append(f"\n(report collected in {(time.perf_counter() - started) * 1000:.1f} ms)")
         return "\n".join(report)
     
     except Exception as e:
         return f"Diagnostic failed: {str(e)}"
 
+def load_library_context(query=None, library_dir="library"):
+    """Library text for the system prompt: every file while small, else the user facts plus the best notes for query"""
+    files = []
+    if os.path.exists(library_dir):
+        for filename in sorted(os.listdir(library_dir)):
+            if filename.endswith('.txt'):
+                files.append((filename, os.path.join(library_dir, filename)))
+    total = sum(os.path.getsize(path) for _, path in files)
+    
+    memory_context = ""
+    for filename, filepath in files:
+        if total > LIBRARY_CONTEXT_CHARS and filename != LIBRARY_ALWAYS_FILE: continue
+        with open(filepath, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+            if content:
+                memory_context += f"\n[{filename}]\n{content}\n"
+    
+    if total > LIBRARY_CONTEXT_CHARS and query:
+        import librarian
+        # A long librarian job (e.g. a first semantic sync) may hold the index; don't stall the turn on it
+        if not librarian.INDEX_LOCK.acquire(timeout=LIBRARY_LOCK_TIMEOUT): return memory_context
+        try: hits = [hit for hit in librarian.search_ranked(query, LIBRARY_TOP_K) if hit.filename != LIBRARY_ALWAYS_FILE]
+        finally: librarian.INDEX_LOCK.release()
+        if hits:
+            memory_context += "\n[most relevant notes]\n" + "\n".join(hit.text for hit in hits) + "\n"
+    return memory_context
+
 # --- 4. THE BRAIN ---
-def parse_and_execute(ai_text):
-    """Parse and execute commands from AI text. Only executes commands from AI, not from tool output."""
-    execution_log = []
+# Directive tokenizer - STRICT PARSING (each directive must be on its own line)
+DIRECTIVE_RE = re.compile(
+    r'^(?:(CMD|WRITE|UPDATE|READ):\s*(.*?)'
+    r'|(RELOAD|REFRESH|CLEAR|RESET|DIAGNOSE|DIAGNOSTIC|CHECK))\s*$',
+    re.IGNORECASE
+)
+DIRECTIVE_ARGS = {
+    'CMD': re.compile(r'^(.+)$'),
+    'WRITE': re.compile(r'^(\S+)\s*\|\s*(.+)$'),
+    'UPDATE': re.compile(r'^(\S+)\s*\|\s*([^|]+)\s*\|\s*(.+?)(?:\s*\|\s*(\d+))?$'),
+    'READ': re.compile(r'^(\S+)(?:\s+(lines|bytes|find)\s+(.+))?$', re.IGNORECASE),
+}
+DIRECTIVE_ALIASES = {'REFRESH': 'RELOAD', 'RESET': 'CLEAR', 'DIAGNOSTIC': 'DIAGNOSE', 'CHECK': 'DIAGNOSE'}
+TOOL_KINDS = ('CMD', 'READ', 'WRITE', 'UPDATE')
+
+Directive = collections.namedtuple('Directive', ['kind', 'args', 'line'])
+TOOL_TIMINGS = collections.deque(maxlen=100)  # (kind, target, seconds) of recent directives
+TOOL_POOL = None  # created on first tool call
+
+def tool_pool():
+    global TOOL_POOL
+    if TOOL_POOL is None:
+        import concurrent.futures
+        TOOL_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_TOOL_WORKERS)
+    return TOOL_POOL
+
+def parse_line(line, line_no=0):
+    """Tokenize a single line; returns a Directive or None"""
+    match = DIRECTIVE_RE.match(line)
+    if not match: return None
+    if match.group(3):
+        kind = match.group(3).upper()
+        return Directive(DIRECTIVE_ALIASES.get(kind, kind), (), line_no)
+    kind = match.group(1).upper()
+    args = DIRECTIVE_ARGS[kind].match(match.group(2))
+    if not args: return None
+    return Directive(kind, tuple(a.strip() if a else a for a in args.groups()), line_no)
+
+def parse_directives(ai_text):
+    """Tokenize AI text into an ordered list of directives in one pass over its lines."""
+    directives = []
     clean_text = ai_text.replace("AI:", "").strip()
-    
+    for line_no, line in enumerate(clean_text.splitlines()):
+        directive = parse_line(line, line_no)
+        if directive: directives.append(directive)
+    return directives
+
+def has_tool_directive(directives):
+    """True if the AI actually used a tool (not just talked about it)"""
+    return any(d.kind in TOOL_KINDS for d in directives)
+
+def _exec_reload(directive):
+    print(f"{Fore.CYAN}>>> RELOADING KERNEL{Style.RESET_ALL}")
+    return reload_kernel()
+
+def _exec_clear(directive):
+    print(f"{Fore.CYAN}>>> CLEARING SYSTEM{Style.RESET_ALL}")
+    return clear_system()
+
+def _exec_diagnose(directive):
+    print(f"{Fore.CYAN}>>> RUNNING DIAGNOSTICS{Style.RESET_ALL}")
+    return diagnose_command()
+
+def _exec_update(directive):
+    """The Scalpel"""
+    fname, old, new, count = directive.args
+    # SAFETY: Reject if new_text is too long (likely AI explanation got captured)
+    if len(new) > 100:
+        return f"ERROR: new_text rejected - too long ({len(new)} chars). Must be under 100 chars."
+    print(f"{Fore.MAGENTA}>>> UPDATING FILE: {fname}{Style.RESET_ALL}")
+    print(f"{Fore.MAGENTA}    Replacing: '{old}' -> '{new}'{Style.RESET_ALL}")
+    return update_file(fname, old, new, int(count) if count else None)
+
+def _exec_write(directive):
+    """The Nuke"""
+    fname, content = directive.args
+    print(f"{Fore.MAGENTA}>>> OVERWRITING FILE: {fname}{Style.RESET_ALL}")
+    return write_file(fname, content)
+
+def _exec_read(directive):
+    fname, mode, spec = directive.args
+    print(f"{Fore.MAGENTA}>>> READING FILE: {fname}{f' ({mode} {spec})' if mode else ''}{Style.RESET_ALL}")
+    result = read_file(fname, mode, spec)
+    return f"FILE CONTENT ({fname}):\n{result}"
+
+def _exec_cmd(directive):
+    cmd, = directive.args
+    print(f"{Fore.RED}>>> EXECUTING: {cmd}{Style.RESET_ALL}")
+    return f"TERMINAL OUTPUT: {run_command(cmd)}"
+
+DISPATCH = {
+    'RELOAD': _exec_reload,
+    'CLEAR': _exec_clear,
+    'DIAGNOSE': _exec_diagnose,
+    'UPDATE': _exec_update,
+    'WRITE': _exec_write,
+    'READ': _exec_read,
+    'CMD': _exec_cmd,
+}
+
+def execute_directive(directive):
+    """Run one directive through the dispatch table and record its timing"""
+    started = time.perf_counter()
+    result = DISPATCH[directive.kind](directive)
+    elapsed = time.perf_counter() - started
+    target = directive.args[0] if directive.args else ''
+    TOOL_TIMINGS.append((directive.kind, target, elapsed))
+    TRACER.record(f"tool.{directive.kind}", started, elapsed, target=target)
+    return result
+
+def _conflicts(earlier, later):
+    """True if two directives must run in source order"""
+    if earlier.kind not in TOOL_KINDS or later.kind not in TOOL_KINDS:
+        return True  # RELOAD / CLEAR / DIAGNOSE are barriers
+    if any(d.kind == 'CMD' and not starts_early(d) for d in (earlier, later)):
+        return True  # an arbitrary command may write any file (e.g. "CMD: python x.py > out.txt")
+    writes = ('WRITE', 'UPDATE')
+    if earlier.kind == 'CMD' or later.kind == 'CMD':
+        # A read-only command may read any file, so it only orders against edits
+        return earlier.kind in writes or later.kind in writes
+    if earlier.kind not in writes and later.kind not in writes:
+        return False  # READ after READ
+    same_file = os.path.normcase(os.path.abspath(earlier.args[0])) == os.path.normcase(os.path.abspath(later.args[0]))
+    return same_file
+
+def plan_directives(directives):
+    """Group directives into waves; directives within a wave are independent"""
+    levels = []
+    for i, directive in enumerate(directives):
+        level = 0
+        for j in range(i):
+            if levels[j] >= level and _conflicts(directives[j], directive):
+                level = levels[j] + 1
+        levels.append(level)
+    waves = [[] for _ in range(max(levels) + 1)] if levels else []
+    for i, level in enumerate(levels):
+        waves[level].append(i)
+    return waves
+
+def execute_directives(directives, started=None):
+    """Execute directives wave by wave on the tool pool; results keep source order.
+
+    started maps directive index -> Future for tools already launched while streaming.
+    """
+    started = started or {}
+    results = [None] * len(directives)
+    for wave in plan_directives(directives):
+        pending = {i: started[i] if i in started else tool_pool().submit(execute_directive, directives[i])
+                   for i in wave}
+        for i, future in pending.items():
+            results[i] = future.result()
+    return results
+
+def execute_ai_directives(ai_text, directives=None, started=None):
+    """Parse and execute commands from AI text; returns one result string per directive."""
     # SAFETY: Only parse commands from the original AI text, not from tool output
     # This prevents command injection from tool output
-    
-    # Tool Regex Patterns - STRICT PARSING (must be on own line)
-    cmd_matches = re.findall(r'^CMD:\s*(.+)$', clean_text, re.MULTILINE | re.IGNORECASE)
-    write_matches = re.findall(r'^WRITE:\s*(\S+)\s*\|\s*(.+)$', clean_text, re.MULTILINE | re.IGNORECASE)
-    update_matches = re.findall(r'^UPDATE:\s*(\S+)\s*\|\s*([^|]+)\s*\|\s*(.+)$', clean_text, re.MULTILINE | re.IGNORECASE)
-    read_matches = re.findall(r'^READ:\s*(\S+)\s*$', clean_text, re.MULTILINE | re.IGNORECASE)
-    
-    # System control commands - must be on their own line
-    reload_matches = re.findall(r'^(RELOAD|REFRESH)\s*$', clean_text, re.MULTILINE | re.IGNORECASE)
-    clear_matches = re.findall(r'^(CLEAR|RESET)\s*$', clean_text, re.MULTILINE | re.IGNORECASE)
-    diagnose_matches = re.findall(r'^(DIAGNOSE|DIAGNOSTIC|CHECK)\s*$', clean_text, re.MULTILINE | re.IGNORECASE)
-
-    # Execute System Commands First
-    for _ in reload_matches:
-        print(f"{Fore.CYAN}>>> RELOADING KERNEL{Style.RESET_ALL}")
-        result = reload_kernel()
-        execution_log.append(result)
-        
-    for _ in clear_matches:
-        print(f"{Fore.CYAN}>>> CLEARING SYSTEM{Style.RESET_ALL}")
-        result = clear_system()
-        execution_log.append(result)
-        
-    for _ in diagnose_matches:
-        print(f"{Fore.CYAN}>>> RUNNING DIAGNOSTICS{Style.RESET_ALL}")
-        result = diagnose_command()
-        execution_log.append(result)
-
-    # Execute Updates FIRST (The Scalpel)
-    for fname, old, new in update_matches:
-        fname = fname.strip()
-        old = old.strip()
-        new = new.strip()
-        # SAFETY: Reject if new_text is too long (likely AI explanation got captured)
-        if len(new) > 100:
-            execution_log.append(f"ERROR: new_text rejected - too long ({len(new)} chars). Must be under 100 chars.")
-            continue
-        print(f"{Fore.MAGENTA}>>> UPDATING FILE: {fname}{Style.RESET_ALL}")
-        print(f"{Fore.MAGENTA}    Replacing: '{old}' -> '{new}'{Style.RESET_ALL}")
-        result = update_file(fname, old, new)
-        execution_log.append(result)
-
-    # Execute Writes (The Nuke)
-    for fname, content in write_matches:
-        fname = fname.strip()
-        print(f"{Fore.MAGENTA}>>> OVERWRITING FILE: {fname}{Style.RESET_ALL}")
-        result = write_file(fname, content.strip())
-        execution_log.append(result)
-
-    # Execute Reads
-    for fname in read_matches:
-        fname = fname.strip()
-        print(f"{Fore.MAGENTA}>>> READING FILE: {fname}{Style.RESET_ALL}")
-        result = read_file(fname)
-        execution_log.append(f"FILE CONTENT ({fname}):\n{result[:1000]}...") 
-
-    # Execute Commands
-    for cmd in cmd_matches:
-        cmd = cmd.strip()
-        if not cmd: continue
-        print(f"{Fore.RED}>>> EXECUTING: {cmd}{Style.RESET_ALL}")
-        result = run_command(cmd)
-        execution_log.append(f"TERMINAL OUTPUT: {result}")
+    if directives is None:
+        directives = parse_directives(ai_text)
+
+    # Independent READ/CMD calls run concurrently; the log keeps the order the AI wrote them
+    return execute_directives(directives, started)
 
+def parse_and_execute(ai_text, directives=None, started=None):
+    """Parse and execute commands from AI text. Only executes commands from AI, not from tool output."""
+    execution_log = execute_ai_directives(ai_text, directives, started)
     if not execution_log: return None
     return "\n".join(execution_log)
 
+# --- 5. STREAMING ---
+EARLY_START_KINDS = ('READ',)  # Tools that may start before the reply is finished (read-only)
+# Read-only CMDs that may also start early: (script, modes). Every other CMD waits for the full reply.
+EARLY_START_COMMANDS = {'researcher.py': ('search', 'read'), 'librarian.py': ('search', 'scan')}
+
+def starts_early(directive):
+    """True if a directive is read-only and may run while the reply is still streaming"""
+    if directive.kind in EARLY_START_KINDS: return True
+    if directive.kind != 'CMD': return False
+    command, = directive.args
+    if any(c in command for c in '|&;<>`$'): return False
+    try: argv = shlex.split(command)
+    except ValueError: return False
+    if len(argv) < 3 or os.path.basename(argv[0]).lower().removesuffix('.exe') not in PYTHON_NAMES: return False
+    modes = EARLY_START_COMMANDS.get(argv[1].lower().replace('\\', '/').removeprefix('./'), ())
+    return argv[2].lower() in modes
+TURN_STATS = collections.deque(maxlen=50)  # Per-reply streaming metrics
+PACKER = ContextPacker(CONTEXT_TOKENS or DEFAULT_CONTEXT)  # window updated by context_tokens()
+
+def stream_reply(messages, label, on_token=None):
+    """Stream a reply to the terminal (or on_token), launching complete read-only tool lines as they arrive.
+
+    Returns (ai_text, directives, started) where started maps directive index -> Future.
+    """
+    request_time = time.perf_counter()
+    stats = {'first_token': None, 'generation': None, 'early_tools': 0, 'overlap': 0.0}
+    chunks = []
+    line_buffer = ""
+    seen_text = False
+    early = []  # (directive, future or None) in source order
+
+    def launch(directive):
+        def timed():
+            tool_start = time.perf_counter()
+            try:
+                return execute_directive(directive)
+            finally:
+                # Only the part of the tool run that happened during generation counts
+                generation_end = request_time + stats['generation'] if stats['generation'] is not None else time.perf_counter()
+                stats['overlap'] += max(0.0, min(time.perf_counter(), generation_end) - tool_start)
+        stats['early_tools'] += 1
+        return tool_pool().submit(timed)
+
+    if on_token is None:
+        print(label, end="", flush=True)
+        on_token = lambda token: print(token, end="", flush=True)
+    for chunk in _llm().chat(model=MODEL, messages=messages, stream=True, options={'num_ctx': context_tokens()}):
+        if chunk.get('done'):
+            # Final chunk carries Ollama's own timing counters (durations in ns)
+            if chunk.get('eval_duration'):
+                stats['tokens_per_s'] = chunk['eval_count'] / (chunk['eval_duration'] / 1e9)
+            if chunk.get('prompt_eval_duration'):
+                stats['prompt_tokens_per_s'] = chunk['prompt_eval_count'] / (chunk['prompt_eval_duration'] / 1e9)
+        token = chunk['message']['content']
+        if not token: continue
+        if stats['first_token'] is None: stats['first_token'] = time.perf_counter() - request_time
+        on_token(token)
+        chunks.append(token)
+
+        line_buffer += token
+        while "\n" in line_buffer:
+            line, line_buffer = line_buffer.split("\n", 1)
+            line = line.replace("AI:", "")
+            if not seen_text: line = line.lstrip()
+            seen_text = seen_text or bool(line.strip())
+            directive = parse_line(line)
+            if directive is None: continue
+            if starts_early(directive) and not any(_conflicts(d, directive) for d, _ in early):
+                early.append((directive, launch(directive)))
+            else:
+                early.append((directive, None))
+    if label: print()
+    stats['generation'] = time.perf_counter() - request_time
+    if stats['first_token'] is None: stats['first_token'] = stats['generation']
+    TURN_STATS.append(stats)
+
+    ai_text = "".join(chunks)
+    directives = parse_directives(ai_text)
+
+    # Map tools launched mid-stream onto the final directive list
+    started = {}
+    position = 0
+    for directive, future in early:
+        while position < len(directives) and directives[position][:2] != directive[:2]:
+            position += 1
+        if position == len(directives): break
+        if future is not None: started[position] = future
+        position += 1
+    return ai_text, directives, started
+
 SYSTEM_PROMPT = """
 You are JARVIS, a sovereign AI operating system kernel with advanced tools and protocols.
 
@@ -295,8 +765,12 @@ MODES:
 
 TOOLS (MUST USE EXACT FORMAT - one command per line):
 - CMD: <command> - Execute a terminal command
-- READ: <filename> - Read a file
+- READ: <filename> - Read the start of a file
+- READ: <filename> lines <from>-<to> - Read a line range
+- READ: <filename> bytes <offset>+<length> - Read a byte window
+- READ: <filename> find <text> - Show the lines containing text
 - UPDATE: <filename> | <old_text> | <new_text> - Replace text in a file
+- UPDATE: <filename> | <old_text> | <new_text> | <count> - Replace only the first <count> matches
 - WRITE: <filename> | <content> - Overwrite a file
 
 WHEN TO USE WHICH TOOL:
@@ -306,6 +780,8 @@ WHEN TO USE WHICH TOOL:
    - Information NOT in the user's saved memory
    - Dates, statistics, releases, sports scores, etc.
    - Example: "What is the release date of GTA 6?" → CMD: python researcher.py search "GTA 6 release date"
+   - Need the page contents too? One command searches, reads the top pages and merges them:
+     CMD: python researcher.py research "GTA 6 release date"
 
 2. LOCAL LIBRARY (librarian.py) - Use ONLY when:
    - User explicitly asks to search their saved notes/memory
@@ -331,13 +807,90 @@ PERSONALITY:
 You are the user's sovereign AI assistant. Be helpful, transparent, and always use the right tool for the job.
 """
 
+def chat_turn(user_input, on_token=None, on_tool_output=None):
+    """Run one chat turn: learn, remember, ask the model and execute its tools.
+
+    With no callbacks the reply and tool output go to the terminal; the server
+    passes on_token / on_tool_output to stream them elsewhere. Returns the final AI text.
+    """
+    turn_start = time.perf_counter()
+    with span("auto_learn"):
+        auto_learn(user_input)
+    with span("save_memory"):
+        save_memory("user", user_input)
+
+    # Whole library while it is small, otherwise only the best hits for this question
+    with span("library_load"):
+        memory_context = load_library_context(user_input)
+
+    messages = [
+        {'role': 'system', 'content': SYSTEM_PROMPT + f"\n\nSAVED INFO:\n{memory_context}"},
+        {'role': 'user', 'content': user_input}
+    ]
+
+    if on_tool_output is None:
+        print(f"{Fore.YELLOW}Thinking...{Style.RESET_ALL}")
+        on_tool_output = lambda output: print(f"{Style.DIM}TOOL OUTPUT:\n{output}{Style.RESET_ALL}")
+    try:
+        max_tool_iterations = 3  # Prevent infinite loops
+        tool_iteration = 0
+        final_ai_text = None
+        
+        while tool_iteration < max_tool_iterations:
+            iteration_start = time.perf_counter()
+            # Stream the reply; READ and read-only CMD lines start running before it finishes
+            label_color = Fore.GREEN if tool_iteration == 0 else Fore.CYAN
+            label = f"{label_color}JARVIS >> {Style.RESET_ALL}" if on_token is None else ""
+            with span("context_pack", iteration=tool_iteration):
+                context_tokens()
+                packed = PACKER.pack(messages)
+            with span("ollama.chat", iteration=tool_iteration):
+                ai_text, directives, started = stream_reply(packed, label, on_token)
+            
+            # Execute any tools the AI mentioned
+            with span("parse_and_execute", iteration=tool_iteration):
+                tool_results = execute_ai_directives(ai_text, directives, started)
+                tool_output = "\n".join(tool_results) if tool_results else None
+            TRACER.record("tool_iteration", iteration_start, time.perf_counter() - iteration_start, iteration=tool_iteration)
+            
+            # Check if AI actually used a tool (not just talked about it)
+            has_actual_command = has_tool_directive(directives)
+            
+            if tool_output and has_actual_command:
+                on_tool_output(tool_output)
+                
+                # Feed tool output back to AI for a proper response
+                messages.append({'role': 'assistant', 'content': ai_text})
+                messages.append(tool_message(tool_results, "\n\nNow provide a helpful response to the user based on this information. Do NOT execute more tools unless absolutely necessary."))
+                
+                tool_iteration += 1
+                if tool_iteration < max_tool_iterations:
+                    if on_token is None: print(f"{Fore.YELLOW}Processing tool results...{Style.RESET_ALL}")
+                    continue  # Loop back to get AI's response to tool output
+                else:
+                    final_ai_text = ai_text
+                    break
+            else:
+                # No tools executed, or just conversation
+                final_ai_text = ai_text
+                break
+        
+        with span("save_memory"):
+            save_memory("ai", final_ai_text)
+        TRACER.record("turn", turn_start, time.perf_counter() - turn_start)
+        return final_ai_text
+    except Exception as e:
+        if on_token is not None: raise
+        print(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}")
+
 def main():
     print(f"{Fore.GREEN}======================================================{Style.RESET_ALL}")
     print(f"{Fore.GREEN}             JARVIS ONLINE - READY{Style.RESET_ALL}")
     print(f"{Fore.GREEN}======================================================{Style.RESET_ALL}")
-    print(f"{Fore.CYAN}MODES: /search <query> | /save <info> | /chat (default){Style.RESET_ALL}")
+    print(f"{Fore.CYAN}MODES: /search <query> | /save <info> | /trace [file] | /chat (default){Style.RESET_ALL}")
     print(f"{Fore.CYAN}Type 'exit' to quit{Style.RESET_ALL}")
     print()
+    refresh_ollama_status()  # warm the DIAGNOSE cache in the background
     
     mode = "chat"  # Default mode
     
@@ -350,17 +903,25 @@ def main():
             if user_input.lower().startswith("/search "):
                 query = user_input[8:].strip()
                 print(f"{Fore.MAGENTA}>>> SEARCHING: {query}{Style.RESET_ALL}")
-                result = run_command(f'python librarian.py search "{query}"')
+                result = search_notes(query)
                 print(f"{Fore.GREEN}JARVIS >> {Style.RESET_ALL}{result}")
                 continue
                 
             if user_input.lower().startswith("/save "):
                 info = user_input[6:].strip()
                 print(f"{Fore.MAGENTA}>>> SAVING: {info}{Style.RESET_ALL}")
-                result = run_command(f'python librarian.py add "notes" "{info}"')
+                result = save_note(info)
                 print(f"{Fore.GREEN}JARVIS >> {Style.RESET_ALL}Got it! I'll remember that.")
                 continue
             
+            if user_input.lower().startswith("/trace"):
+                # Export recorded spans: .jsonl -> one span per line, anything else -> Chrome trace
+                path = user_input[6:].strip() or "trace.json"
+                if path.endswith(".jsonl"): count = TRACER.export_jsonl(path)
+                else: count = TRACER.export_chrome(path)
+                print(f"{Fore.GREEN}JARVIS >> {Style.RESET_ALL}Wrote {count} spans to {path}")
+                continue
+            
             if user_input.lower() == "/search":
                 print(f"{Fore.YELLOW}Usage: /search <query>{Style.RESET_ALL}")
                 continue
@@ -370,69 +931,7 @@ def main():
                 continue
             
             # CHAT MODE - Auto-learn still works
-            auto_learn(user_input)
-            save_memory("user", user_input)
-            
-            # Load ALL library files for smart chat
-            memory_context = ""
-            library_dir = "library"
-            if os.path.exists(library_dir):
-                for filename in os.listdir(library_dir):
-                    if filename.endswith('.txt'):
-                        filepath = os.path.join(library_dir, filename)
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            content = f.read().strip()
-                            if content:
-                                memory_context += f"\n[{filename}]\n{content}\n"
-            
-            messages = [
-                {'role': 'system', 'content': SYSTEM_PROMPT + f"\n\nSAVED INFO:\n{memory_context}"},
-                {'role': 'user', 'content': user_input}
-            ]
-
-            print(f"{Fore.YELLOW}Thinking...{Style.RESET_ALL}")
-            try:
-                max_tool_iterations = 3  # Prevent infinite loops
-                tool_iteration = 0
-                final_ai_text = None
-                
-                while tool_iteration < max_tool_iterations:
-                    response = ollama.chat(model=MODEL, messages=messages)
-                    ai_text = response['message']['content']
-                    
-                    if tool_iteration == 0:
-                        print(f"{Fore.GREEN}JARVIS >> {Style.RESET_ALL}{ai_text}")
-                    else:
-                        print(f"{Fore.CYAN}JARVIS >> {Style.RESET_ALL}{ai_text}")
-                    
-                    # Execute any tools the AI mentioned
-                    tool_output = parse_and_execute(ai_text)
-                    
-                    # Check if AI actually used a tool (not just talked about it)
-                    has_actual_command = bool(re.search(r'^(CMD|READ|WRITE|UPDATE):', ai_text, re.MULTILINE | re.IGNORECASE))
-                    
-                    if tool_output and has_actual_command:
-                        print(f"{Style.DIM}TOOL OUTPUT:\n{tool_output}{Style.RESET_ALL}")
-                        
-                        # Feed tool output back to AI for a proper response
-                        messages.append({'role': 'assistant', 'content': ai_text})
-                        messages.append({'role': 'user', 'content': f"Tool execution completed:\n{tool_output}\n\nNow provide a helpful response to the user based on this information. Do NOT execute more tools unless absolutely necessary."})
-                        
-                        tool_iteration += 1
-                        if tool_iteration < max_tool_iterations:
-                            print(f"{Fore.YELLOW}Processing tool results...{Style.RESET_ALL}")
-                            continue  # Loop back to get AI's response to tool output
-                        else:
-                            final_ai_text = ai_text
-                            break
-                    else:
-                        # No tools executed, or just conversation
-                        final_ai_text = ai_text
-                        break
-                
-                save_memory("ai", final_ai_text)
-            except Exception as e:
-                print(f"{Fore.RED}Error: {str(e)}{Style.RESET_ALL}")
+            chat_turn(user_input)
 
         except KeyboardInterrupt: 
             print(f"\n{Fore.YELLOW}Graceful shutdown...{Style.RESET_ALL}")
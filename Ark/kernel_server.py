@@ -0,0 +1,253 @@
+"""
+Kernel Server - Headless JARVIS kernel over local HTTP
+
+Keeps one warm kernel process (model client, fact table, tool pool) and
+exposes it to the Flutter AI screens and other local tools.
+
+Endpoints (JSON in, JSON out; /chat streams NDJSON):
+    GET  /health            -> {"status": "ok", "model": ...}
+    POST /chat   {"message"} -> stream of {"type": "token"|"tool"|"done"|"error", ...}
+    POST /search {"query", "k"?} -> {"results": [{"score", "file", "line", "text"}, ...]}
+    POST /save   {"info", "category"?} -> {"saved": true}   (category: letters, digits, _ and -)
+    POST /tool   {"text"}    -> {"output": "..."}   (runs CMD/READ/... directives)
+
+Usage:
+    python kernel_server.py [port]
+
+The server binds to 127.0.0.1 only; it executes tool directives and must not
+be exposed to the network. Binding locally does not stop a web page in the
+user's browser from posting to it, so every request must also:
+    - carry the per-run secret from cache/kernel_server.token (mode 0600)
+      in the X-Ark-Token header
+    - name a local Host (127.0.0.1 / localhost on the server's port)
+    - come without an Origin, or from one listed in ARK_SERVER_ORIGINS
+    - send POST bodies as Content-Type: application/json, which browsers
+      cannot do cross-origin without a preflight
+"""
+
+import hmac
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import kernel
+import librarian
+
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TOKEN_FILE = os.path.join("cache", "kernel_server.token")
+TOKEN_HEADER = "X-Ark-Token"
+CATEGORY_RE = re.compile(r"[\w-]+")  # /save categories become library/<category>.txt: no separators or dots
+LOCAL_HOSTS = ("127.0.0.1", "localhost")
+# Browser origins allowed to call the API (e.g. a Flutter web build); none by default
+ALLOWED_ORIGINS = {o.strip() for o in os.environ.get("ARK_SERVER_ORIGINS", "").split(",") if o.strip()}
+
+# One chat turn at a time: turns share brain.json and the fact table
+CHAT_LOCK = threading.Lock()
+
+
+def write_token(path=TOKEN_FILE):
+    """Create a fresh secret for this run, readable by the current user only"""
+    token = secrets.token_urlsafe(32)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)  # O_CREAT keeps the mode of an existing file
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    return token
+
+
+class KernelHandler(BaseHTTPRequestHandler):
+    """Routes local API requests to the warm kernel"""
+
+    server_version = "ArkKernel/1.0"
+    protocol_version = "HTTP/1.1"  # chunked streaming for /chat
+
+    def log_message(self, format, *args):
+        pass  # keep the console for kernel output
+
+    def _origin(self):
+        return self.headers.get("Origin")
+
+    def _reject(self, message, status):
+        self.close_connection = True  # the unread body would be parsed as the next request
+        self._send_json({"error": message}, status)
+
+    def _allowed(self, check_token=True):
+        """Reject foreign Host/Origin headers and requests without the run token"""
+        host, _, port = (self.headers.get("Host") or "").rpartition(":")
+        if host not in LOCAL_HOSTS or port != str(self.server.server_port):
+            self._reject("Forbidden host", 403)
+            return False
+        origin = self._origin()
+        if origin is not None and origin not in ALLOWED_ORIGINS:
+            self._reject("Forbidden origin", 403)
+            return False
+        if check_token and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, "").encode(), self.server.token.encode()):
+            self._reject(f"Missing or invalid {TOKEN_HEADER}", 401)
+            return False
+        return True
+
+    def _cors_headers(self):
+        origin = self._origin()
+        if origin in ALLOWED_ORIGINS:
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def _text_field(self, payload, name, default=None):
+        """Non-empty string field of the body, or None after answering 400"""
+        value = payload.get(name, default)
+        if not isinstance(value, str) or not value.strip():
+            self._send_json({"error": f"{name} must be a non-empty string"}, 400)
+            return None
+        return value
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self._cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_event(self, event):
+        """Write one NDJSON event as an HTTP chunk"""
+        data = (json.dumps(event) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_OPTIONS(self):
+        if not self._allowed(check_token=False):  # preflights carry no custom headers
+            return
+        self.send_response(204)
+        self._cors_headers()
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", f"Content-Type, {TOKEN_HEADER}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        if self.path == "/health":
+            self._send_json({"status": "ok", "model": kernel.MODEL})
+        else:
+            self._send_json({"error": f"Unknown endpoint {self.path}"}, 404)
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            self._reject("Content-Type must be application/json", 415)
+            return
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json({"error": "Invalid JSON body"}, 400)
+            return
+        if not isinstance(payload, dict):
+            self._send_json({"error": "JSON body must be an object"}, 400)
+            return
+
+        try:
+            if self.path == "/chat":
+                self._chat(payload)
+            elif self.path == "/search":
+                k = payload.get("k", librarian.SEARCH_LIMIT)
+                if not isinstance(k, int) or isinstance(k, bool) or k < 1:
+                    self._send_json({"error": "k must be a positive integer"}, 400)
+                    return
+                query = self._text_field(payload, "query")
+                if query is None:
+                    return
+                hits = librarian.search_ranked(query, k)
+                self._send_json({"results": [{"score": hit.score, "file": hit.filename, "line": hit.line_no, "text": hit.text}
+                                             for hit in hits]})
+            elif self.path == "/save":
+                category = self._text_field(payload, "category", "notes")
+                if category is None:
+                    return
+                if not CATEGORY_RE.fullmatch(category.strip()):
+                    self._send_json({"error": "category may only contain letters, digits, '_' and '-'"}, 400)
+                    return
+                info = self._text_field(payload, "info")
+                if info is None:
+                    return
+                librarian.add_note(category, info)
+                self._send_json({"saved": True})
+            elif self.path == "/tool":
+                text = self._text_field(payload, "text")
+                if text is None:
+                    return
+                output = kernel.parse_and_execute(text)
+                self._send_json({"output": output})
+            else:
+                self._send_json({"error": f"Unknown endpoint {self.path}"}, 404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            self._send_json({"error": str(e)}, 500)
+
+    def _chat(self, payload):
+        message = self._text_field(payload, "message")
+        if message is None:
+            return
+        message = message.strip()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self._cors_headers()
+        self.end_headers()
+
+        with CHAT_LOCK:
+            try:
+                text = kernel.chat_turn(
+                    message,
+                    on_token=lambda token: self._send_event({"type": "token", "text": token}),
+                    on_tool_output=lambda output: self._send_event({"type": "tool", "output": output}),
+                )
+                self._send_event({"type": "done", "text": text})
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as e:
+                self._send_event({"type": "error", "error": str(e)})
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def serve(port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((HOST, port), KernelHandler)
+    server.daemon_threads = True
+    server.token = write_token()
+    print(f"[KERNEL SERVER] Listening on http://{HOST}:{port} (model: {kernel.MODEL})")
+    print(f"[KERNEL SERVER] Send the token in {TOKEN_FILE} as the {TOKEN_HEADER} header")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[KERNEL SERVER] Shutting down...")
+    finally:
+        server.server_close()
+        try:
+            os.remove(TOKEN_FILE)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT)
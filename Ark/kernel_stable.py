@@ -7,6 +7,7 @@ import re
 import sys
 import importlib
 from colorama import Fore, Style, init
+from file_lock import locked, atomic_write
 
 init(autoreset=True)
 
@@ -16,18 +17,23 @@ MEMORY_FILE = "brain.json"
 PROTECTED_FILES = ['kernel.py', './kernel.py', 'c:\\users\\konst\\desktop\\ark\\kernel.py']
 
 # --- 1. MEMORY SYSTEM ---
-def load_memory():
+def _read_memory():
     if not os.path.exists(MEMORY_FILE): return []
     try:
         with open(MEMORY_FILE, 'r', encoding='utf-8') as f: return json.load(f)
     except: return []
 
+def load_memory():
+    with locked(MEMORY_FILE): return _read_memory()
+
 def save_memory(role, text):
-    history = load_memory()
-    timestamp = datetime.datetime.now().isoformat()
-    if len(history) > 20: history = history[-20:]
-    history.append({"role": role, "text": text, "time": timestamp})
-    with open(MEMORY_FILE, 'w', encoding='utf-8') as f: json.dump(history, f, indent=2)
+    # kernel.py may be running too: lock across processes
+    with locked(MEMORY_FILE):
+        history = _read_memory()
+        timestamp = datetime.datetime.now().isoformat()
+        if len(history) > 20: history = history[-20:]
+        history.append({"role": role, "text": text, "time": timestamp})
+        atomic_write(MEMORY_FILE, json.dumps(history, indent=2))
 
 def recall_memory(query):
     history = load_memory()
@@ -1,48 +1,343 @@
 import sys
 import os
+import json
 import glob
+import mmap
+import contextlib
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from file_lock import locked
+from file_reader import folded_pattern, line_chunks, match_lines
+from library_index import LibraryIndex, ScoredNote, content_hash, query_terms
 
 LIBRARY_DIR = "library"
 if not os.path.exists(LIBRARY_DIR): os.makedirs(LIBRARY_DIR)
 
+USE_INDEX = os.environ.get("ARK_LIBRARY_INDEX", "1") != "0"  # "0": no index files, search scans library/*.txt
+SEARCH_LIMIT = 10  # hits shown by search_notes
+SCAN_WORKERS = 4  # threads used by scan_notes
+SCAN_CHUNK = 4 << 20  # bytes per scan task; large files are split across the pool
+IMPORT_BATCH = 1000  # notes per append + index update during bulk import
+IMPORT_EXTENSIONS = (".txt", ".md")
+INDEX = None  # LibraryIndex, loaded on first use
+# INDEX and SEMANTIC are shared by kernel tool threads, server threads and /bg jobs;
+# hold this around every call that reads or updates them
+INDEX_LOCK = threading.RLock()
+
+def library_index():
+    """The token index for LIBRARY_DIR, re-indexing any files changed since last use (call under INDEX_LOCK)"""
+    global INDEX
+    with INDEX_LOCK:
+        if INDEX is None or INDEX.library_dir != LIBRARY_DIR: INDEX = LibraryIndex(LIBRARY_DIR)
+        INDEX.refresh()
+        return INDEX
+
+SEMANTIC = None  # SemanticIndex, created by the first semantic search
+
+def semantic_index():
+    """The embedding index (needs numpy), synced with the token index (call under INDEX_LOCK)"""
+    global SEMANTIC
+    with INDEX_LOCK:
+        if SEMANTIC is None or SEMANTIC.library_dir != LIBRARY_DIR:
+            from semantic_index import SemanticIndex
+            SEMANTIC = SemanticIndex(LIBRARY_DIR)
+        SEMANTIC.sync(library_index())
+        return SEMANTIC
+
+def semantic_enabled():
+    """True once a semantic search has created the vector store (and numpy is importable)"""
+    if not os.path.exists(os.path.join(LIBRARY_DIR, ".vectors.jsonl")): return False
+    try: import semantic_index
+    except ImportError: return False
+    return True
+
+def _append_notes(filename, contents):
+    """Append contents to one category file with a single write, then update the indexes once"""
+    filepath = os.path.join(LIBRARY_DIR, filename)
+    if not USE_INDEX:
+        with locked(filepath), open(filepath, "a", encoding="utf-8") as f:
+            f.write("".join(f"\n{content}\n" for content in contents))
+        return
+    with INDEX_LOCK:
+        index = library_index()
+        files_before = json.dumps(index.files, sort_keys=True)
+        with locked(filepath):
+            stat_before = None
+            if os.path.exists(filepath):
+                stat = os.stat(filepath)
+                stat_before = (stat.st_mtime_ns, stat.st_size)
+            with open(filepath, "a", encoding="utf-8") as f:
+                f.write("".join(f"\n{content}\n" for content in contents))
+            added = index.notes_appended(filename, contents, stat_before)
+        # Keep an existing vector store current: embeds just the new lines
+        if SEMANTIC is not None or semantic_enabled():
+            try:
+                if SEMANTIC is None: semantic_index()
+                else: SEMANTIC.note_added(index, added, files_before)
+            except OSError: pass  # embedding model unreachable: the next sync embeds the new notes
+
 def add_note(category, content):
     # Sanitize filename
     filename = category.lower().strip() + ".txt"
-    filepath = os.path.join(LIBRARY_DIR, filename)
+    _append_notes(filename, [content])
+    return f"[LIBRARIAN] Note added to {filename}."
+
+@contextlib.contextmanager
+def deferred_index_saves():
+    """Bulk writes: hold INDEX_LOCK throughout and write one index snapshot at the end"""
+    if not USE_INDEX:
+        yield
+        return
+    with INDEX_LOCK, library_index().defer_saves():
+        yield
+
+def add_notes(category, notes, batch_size=IMPORT_BATCH):
+    """
+    Bulk add: notes (any iterable, consumed lazily) are whitespace-normalised,
+    de-duplicated against the category and each other, and appended
+    batch_size at a time. Returns (added, skipped).
+    """
+    filename = category.lower().strip() + ".txt"
+    with deferred_index_saves():
+        if USE_INDEX:
+            existing = [text for _, _, text in library_index().notes_in([filename])]
+        else:
+            existing = []
+            filepath = os.path.join(LIBRARY_DIR, filename)
+            if os.path.exists(filepath):
+                with open(filepath, "r", encoding="utf-8", errors="replace") as f: existing = f.read().splitlines()
+        return _add_batches(filename, notes, batch_size, existing)
+
+def _add_batches(filename, notes, batch_size, existing):
+    seen = {content_hash(text) for text in existing if text.strip()}
+    added = skipped = 0
+    batch = []
+    for note in itertools.chain(notes, [None]):
+        if note is not None:
+            note = " ".join(note.split())
+            digest = content_hash(note)
+            if not note or digest in seen:
+                skipped += bool(note)
+                continue
+            seen.add(digest)
+            batch.append(note)
+        if batch and (note is None or len(batch) >= batch_size):
+            _append_notes(filename, batch)
+            added += len(batch)
+            batch = []
+    return added, skipped
+
+def read_paragraphs(path):
+    """Yield the blank-line separated paragraphs of a text/markdown file"""
+    paragraph = []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in itertools.chain(f, [""]):
+            if line.strip(): paragraph.append(line.strip())
+            elif paragraph:
+                yield " ".join(paragraph)
+                paragraph = []
+
+def import_notes(source, category=None):
+    """
+    Bulk import from a directory of .txt/.md files, a single file, or "-" (stdin, one note per line)
+
+    Files go to their own category (file name without extension) unless category is given.
+    "-" is only honoured when librarian.py is the script being run: imported into the
+    kernel or kernel_server, stdin is the host's own input and reading it would hang.
+    """
+    started = time.perf_counter()
+    if source == "-" and __name__ != "__main__":
+        return "[LIBRARIAN] Import from stdin only works from the command line (python librarian.py import -)."
+    if source == "-":
+        jobs = [(category or "notes", (line for line in sys.stdin))]
+    elif os.path.isdir(source):
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source)
+                       if name.lower().endswith(IMPORT_EXTENSIONS))
+        jobs = [(category or os.path.splitext(os.path.basename(path))[0], read_paragraphs(path)) for path in paths]
+    elif os.path.isfile(source):
+        jobs = [(category or os.path.splitext(os.path.basename(source))[0], read_paragraphs(source))]
+    else:
+        return f"[LIBRARIAN] Nothing to import at '{source}'."
     
-    with open(filepath, "a", encoding="utf-8") as f:
-        f.write(f"\n{content}\n")
-    print(f"[LIBRARIAN] Note added to {filename}.")
-
-def search_notes(query):
-    print(f"[LIBRARIAN] Searching for '{query}'...")
-    found = False
-    query_lower = query.lower()
+    added = skipped = 0
+    with deferred_index_saves():
+        for job_category, notes in jobs:
+            job_added, job_skipped = add_notes(job_category, notes)
+            added += job_added
+            skipped += job_skipped
+    elapsed = time.perf_counter() - started
+    rate = added / elapsed if elapsed > 0 else 0.0
+    return (f"[LIBRARIAN] Imported {added} notes into {len(jobs)} categories "
+            f"({skipped} duplicates skipped) in {elapsed:.2f}s ({rate:,.0f} notes/s).")
+
+def search_ranked(query, k=SEARCH_LIMIT):
+    """Best k notes for query by BM25, as ScoredNote(score, filename, line_no, text) tuples"""
+    if not USE_INDEX: return scan_ranked(query, k)
+    with INDEX_LOCK: return library_index().ranked(query, k)
+
+def scan_ranked(query, k=SEARCH_LIMIT):
+    """Index-free search_ranked: one scan_notes pass per query word, rarer words weigh more"""
+    found = {}  # (filename, line_no) -> (text, matched terms)
+    frequency = {}
+    for term in dict.fromkeys(t.rstrip("*") for t in query_terms(query)):
+        frequency[term] = 0
+        for filename, line_no, text in scan_notes(term):
+            found.setdefault((filename, line_no), (text, []))[1].append(term)
+            frequency[term] += 1
+    if not found: return []
+    most = max(frequency.values())
+    hits = [ScoredNote(sum(math.log(1 + most / frequency[term]) for term in terms), filename, line_no, text)
+            for (filename, line_no), (text, terms) in found.items()]
+    return sorted(hits, key=lambda hit: (-hit.score, hit.filename, hit.line_no))[:k]
+
+def search_phrase(phrase, k=SEARCH_LIMIT):
+    """First k notes containing phrase (words in order, squat* prefixes allowed), as (filename, line_no, text)"""
+    if not USE_INDEX: return list(itertools.islice(scan_notes(phrase.replace("*", "")), k))
+    with INDEX_LOCK: return library_index().lookup(phrase)[:k]
+
+def search_fuzzy(query, k=SEARCH_LIMIT):
+    """Best k notes allowing typos in query (trigram similarity), as ScoredNote tuples"""
+    if not USE_INDEX: return scan_ranked(query, k)  # typo tolerance needs the index's vocabulary
+    with INDEX_LOCK: return library_index().fuzzy(query, k)
+
+def scan_notes(query, workers=SCAN_WORKERS):
+    """
+    Index-free search: yield (filename, line_no, text) for lines containing query (case-insensitive)
+
+    Files are mmap'd and cut into newline-aligned chunks; a thread pool folds
+    each chunk to lower case and runs one precompiled byte pattern over it
+    (non-ASCII queries decode the chunk and match case-insensitively instead).
+    Hits stream out in file order as soon as the chunks before them are done.
+    """
+    pattern = folded_pattern(query)
+    with contextlib.ExitStack() as stack, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        jobs = []
+        for path in sorted(glob.glob(os.path.join(LIBRARY_DIR, "*.txt"))):
+            if os.path.getsize(path) == 0: continue
+            f = stack.enter_context(open(path, "rb"))
+            mm = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            chunks = [pool.submit(match_lines, mm, start, end, pattern) for start, end in line_chunks(mm, SCAN_CHUNK)]
+            jobs.append((os.path.basename(path), chunks))
+        for filename, chunks in jobs:
+            base = 0
+            for chunk in chunks:
+                hits, newlines = chunk.result()
+                for line_no, line in hits:
+                    text = line.decode("utf-8", errors="replace").strip()
+                    if text: yield filename, base + line_no, text
+                base += newlines
+
+def scan_search(query):
+    """search_notes output from scan_notes (grouped by file, unranked)"""
+    output = [f"[LIBRARIAN] Searching for '{query}'..."]
+    by_file = {}
+    for filename, line_no, text in scan_notes(query):
+        by_file.setdefault(filename, []).append((line_no, text))
+    for filename in sorted(by_file):
+        output.append(f"\n[FOUND]")
+        for line_no, text in sorted(by_file[filename]):
+            output.append(f"  {text}")
+    if not by_file: output.append("No matching notes found.")
+    return "\n".join(output)
+
+def search_notes(query, k=SEARCH_LIMIT):
+    """
+    Ranked search; prints the best k notes (a trailing * makes a word a prefix, e.g. squat*).
+    A query in double quotes ("squat depth") lists the notes containing that exact phrase.
+    """
+    if not USE_INDEX: return scan_search(query.strip('"'))
+    output = [f"[LIBRARIAN] Searching for '{query}'..."]
+    if len(query) > 2 and query.startswith('"') and query.endswith('"'):
+        notes = search_phrase(query[1:-1], k)
+        if notes:
+            output.append(f"\n[FOUND]")
+            for filename, line_no, text in notes:
+                output.append(f"  {text}  ({filename}:{line_no})")
+        else: output.append("No notes contain that phrase.")
+        return "\n".join(output)
+    hits = search_ranked(query, k)
+    if not hits:
+        hits = search_fuzzy(query, k)
+        if hits: output.append("No exact matches; showing similarly spelled notes.")
+    if hits:
+        output.append(f"\n[FOUND]")
+        for hit in hits:
+            output.append(f"  {hit.text}  ({hit.filename}:{hit.line_no}, score {hit.score:.2f})")
+    else: output.append("No matching notes found.")
+    return "\n".join(output)
+
+def search_semantic(query, k=SEARCH_LIMIT):
+    """Best k notes by embedding similarity, as SemanticHit(score, filename, line_no, text) tuples"""
+    with INDEX_LOCK: return semantic_index().search(query, k)
+
+def semantic_notes(query, k=SEARCH_LIMIT):
+    output = [f"[LIBRARIAN] Semantic search for '{query}'..."]
+    if not USE_INDEX: return output[0] + "\nSemantic search needs the library index (unset ARK_LIBRARY_INDEX=0)."
+    try: hits = [hit for hit in search_semantic(query, k) if hit.score > 0]
+    except ImportError: return output[0] + "\nSemantic search needs numpy (pip install numpy)."
+    except OSError as e: return output[0] + f"\nSemantic search unavailable: {SEMANTIC.embedder.name if SEMANTIC else 'embedder'} not reachable ({e})."
+    if hits:
+        output.append(f"\n[FOUND]")
+        for hit in hits:
+            output.append(f"  {hit.text}  ({hit.filename}:{hit.line_no}, similarity {hit.score:.2f})")
+    else: output.append("No matching notes found.")
+    return "\n".join(output)
+
+def compact_library(dry_run=False, threshold=None, drop_near=False):
+    """
+    Normalise every category file and drop exact duplicates, then bring the indexes back in line.
+    Near-duplicates are only reported unless drop_near is set (the newest of each group is kept).
+    """
+    from library_compactor import compact_file, NEAR_DUPLICATE_THRESHOLD
+    threshold = NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    filenames = sorted(name for name in os.listdir(LIBRARY_DIR) if name.endswith(".txt"))
+    with INDEX_LOCK:
+        reports = [compact_file(os.path.join(LIBRARY_DIR, name), threshold, dry_run, drop_near) for name in filenames]
+        if not dry_run and USE_INDEX:
+            library_index()  # re-indexes the rewritten files
+            if SEMANTIC is not None or semantic_enabled():
+                try: semantic_index()  # reuses vectors of surviving notes
+                except OSError: pass  # embedding model unreachable: synced on the next semantic search
     
-    for filepath in glob.glob(os.path.join(LIBRARY_DIR, "*.txt")):
-        try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-            
-            # Find only lines that match the query
-            matching_lines = [line.strip() for line in lines if query_lower in line.lower() and line.strip()]
-            
-            if matching_lines:
-                print(f"\n[FOUND]")
-                for line in matching_lines:
-                    print(f"  {line}")
-                found = True
-        except: continue
+    output = [f"[LIBRARIAN] {'Compaction preview' if dry_run else 'Compacted'} ({len(reports)} files):"]
+    for r in reports:
+        output.append(f"  {r.filename}: {r.notes_before} -> {r.notes_after} notes "
+                      f"({r.duplicates} duplicates, {r.near_duplicates} near-duplicates"
+                      f"{'' if drop_near else ' kept, use --near to remove'}), "
+                      f"{r.bytes_before:,} -> {r.bytes_after:,} bytes")
+    return "\n".join(output)
+
+def run(argv):
+    """Run a CLI command (argv without the script name) and return its output"""
+    usage = ("Usage: python librarian.py [add|search|scan|semantic|import] [category/query/path] [content/category]\n"
+             "       python librarian.py compact [--dry-run] [--near] [--threshold 0.8]")
+    if argv[:1] == ["compact"]:
+        options, threshold = argv[1:], None
+        if "--threshold" in options:
+            at = options.index("--threshold")
+            try: threshold = float(options[at + 1])
+            except (IndexError, ValueError): threshold = None
+            if threshold is None or not 0.0 < threshold <= 1.0:
+                return "--threshold needs a number between 0 and 1.\n" + usage
+            del options[at:at + 2]
+        unknown = [o for o in options if o not in ("--dry-run", "--near")]
+        if unknown: return f"Unknown compact option '{unknown[0]}'.\n" + usage
+        return compact_library(dry_run="--dry-run" in options, threshold=threshold, drop_near="--near" in options)
+    if len(argv) < 2:
+        return usage
+    mode = argv[0]
+    arg1 = argv[1] # Category or Query
+    arg2 = " ".join(argv[2:]) # Content (optional)
     
-    if not found: print("No matching notes found.")
+    if mode == "add": return add_note(arg1, arg2)
+    elif mode == "search": return search_notes(arg1)
+    elif mode == "scan": return scan_search(arg1)
+    elif mode == "semantic": return semantic_notes(arg1)
+    elif mode == "import": return import_notes(arg1, arg2 or None)
+    return f"Unknown mode '{mode}'. Use add, search, scan, semantic, import or compact."
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python librarian.py [add|search] [category/query] [content]")
-    else:
-        mode = sys.argv[1]
-        arg1 = sys.argv[2] # Category or Query
-        arg2 = " ".join(sys.argv[3:]) # Content (optional)
-        
-        if mode == "add": add_note(arg1, arg2)
-        elif mode == "search": search_notes(arg1)
\ No newline at end of file
+    print(run(sys.argv[1:]))
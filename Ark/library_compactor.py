@@ -0,0 +1,137 @@
+"""
+Library Compactor - De-duplicate and normalise librarian category files
+
+add_note() appends blindly, so category files collect blank-line padding,
+repeated notes and reworded copies. Compaction rewrites each file as one
+whitespace-normalised note per line and keeps the newest (last) of:
+
+    exact duplicates   same text ignoring case and whitespace (content hash)
+    near duplicates    character-shingle Jaccard similarity >= threshold,
+                       found through MinHash + LSH banding so only notes
+                       that share a band bucket are ever compared
+
+Near duplicates are often updated facts ("gmail password is hunter2024" ->
+"...hunter2025"), so they are only counted unless drop_near is set; the
+newest note of a group is the one kept.
+
+Files are rewritten atomically under the librarian's file lock.
+"""
+
+import os
+import random
+from typing import Dict, List, NamedTuple, Sequence, Set, Tuple
+
+from file_lock import atomic_write, locked
+from library_index import content_hash
+
+
+SHINGLE_SIZE = 5       # characters per shingle
+NEAR_DUPLICATE_THRESHOLD = 0.8
+LSH_BANDS = 8
+LSH_ROWS = 4           # MinHash values per band (LSH_BANDS * LSH_ROWS permutations)
+_MASKS = [random.Random(seed).getrandbits(64) for seed in range(LSH_BANDS * LSH_ROWS)]
+_MASK64 = (1 << 64) - 1
+
+
+def normalize_note(text: str) -> str:
+    return " ".join(text.split())
+
+
+def shingles(text: str) -> Set[str]:
+    """Character shingles of the lower-cased note (the whole note if it is shorter)"""
+    text = text.lower()
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(shingle_set: Set[str]) -> Tuple[int, ...]:
+    """One minimum per XOR-mask permutation of the shingle hashes"""
+    hashes = [hash(shingle) & _MASK64 for shingle in shingle_set]
+    return tuple(min(h ^ mask for h in hashes) for mask in _MASKS)
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class CompactResult(NamedTuple):
+    notes: List[str]      # kept notes, in original order
+    duplicates: int
+    near_duplicates: int  # found; removed only with drop_near
+
+
+def deduplicate(notes: Sequence[str], threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                drop_near: bool = False) -> CompactResult:
+    """
+    Drop exact duplicates (and near duplicates with drop_near), keeping the newest occurrence
+
+    Args:
+        notes: Normalised note texts, oldest first
+        threshold: Minimum shingle Jaccard similarity for a near duplicate (>= 1.0 disables)
+        drop_near: Remove near duplicates instead of only counting them
+    """
+    kept: List[str] = []
+    kept_shingles: List[Set[str]] = []
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = {}
+    seen = set()
+    duplicates = near_duplicates = 0
+
+    for note in reversed(notes):  # newest first, so the newest copy is the one kept
+        digest = content_hash(note)
+        if digest in seen:
+            duplicates += 1
+            continue
+        seen.add(digest)
+        if threshold >= 1.0:
+            kept.append(note)
+            continue
+
+        shingle_set = shingles(note)
+        signature = minhash(shingle_set)
+        keys = [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]) for band in range(LSH_BANDS)]
+        candidates = {i for key in keys for i in buckets.get(key, ())}
+        if any(jaccard(shingle_set, kept_shingles[i]) >= threshold for i in candidates):
+            near_duplicates += 1
+            if drop_near:
+                continue
+
+        for key in keys:
+            buckets.setdefault(key, []).append(len(kept))
+        kept.append(note)
+        kept_shingles.append(shingle_set)
+
+    kept.reverse()
+    return CompactResult(kept, duplicates, near_duplicates)
+
+
+class FileReport(NamedTuple):
+    filename: str
+    notes_before: int
+    notes_after: int
+    duplicates: int
+    near_duplicates: int
+    bytes_before: int
+    bytes_after: int
+
+
+def compact_file(path: str, threshold: float = NEAR_DUPLICATE_THRESHOLD, dry_run: bool = False,
+                 drop_near: bool = False) -> FileReport:
+    """
+    Rewrite one category file as de-duplicated, one-note-per-line text
+
+    The file is left untouched when nothing would change, so its mtime (and
+    with it every index entry) stays valid.
+    """
+    with locked(path):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            original = f.read()
+        notes = [normalize_note(line) for line in original.splitlines() if line.strip()]
+        result = deduplicate(notes, threshold, drop_near)
+        text = "".join(note + "\n" for note in result.notes)
+        if text != original and not dry_run:
+            atomic_write(path, text)
+    return FileReport(os.path.basename(path), len(notes), len(result.notes), result.duplicates,
+                      result.near_duplicates, len(original.encode("utf-8")), len(text.encode("utf-8")))
@@ -0,0 +1,207 @@
+"""
+Library DB - SQLite/FTS5 backend for librarian notes
+
+An alternative to the plain library/*.txt files for large note collections.
+Notes live in library/notes.db with a category, an ISO timestamp and the
+content; an FTS5 table (kept in sync by triggers) provides BM25-ranked
+search with highlighted snippets. import/export convert to and from the
+text files, so the kernel's library context keeps working either way.
+
+Usage:
+    python library_db.py import                # ingest library/*.txt
+    python library_db.py add notes "Rex is my dog's name"
+    python library_db.py search "dog name"
+    python library_db.py export [directory]    # write <category>.txt files (default library/export/)
+
+Exporting into library/ itself is allowed: notes already in the target files
+are merged into the database first, so text appended since the last import
+is never lost.
+"""
+
+import datetime
+import glob
+import os
+import sqlite3
+import sys
+from typing import List, NamedTuple, Optional
+
+from file_lock import atomic_write, locked
+
+
+LIBRARY_DIR = "library"
+DB_NAME = "notes.db"
+EXPORT_DIR = os.path.join(LIBRARY_DIR, "export")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notes (
+    id       INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    created  TEXT NOT NULL,
+    content  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notes_category ON notes(category);
+CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+    content, category UNINDEXED, content='notes', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS notes_ai AFTER INSERT ON notes BEGIN
+    INSERT INTO notes_fts(rowid, content, category) VALUES (new.id, new.content, new.category);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_ad AFTER DELETE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, content, category) VALUES ('delete', old.id, old.content, old.category);
+END;
+CREATE TRIGGER IF NOT EXISTS notes_au AFTER UPDATE ON notes BEGIN
+    INSERT INTO notes_fts(notes_fts, rowid, content, category) VALUES ('delete', old.id, old.content, old.category);
+    INSERT INTO notes_fts(rowid, content, category) VALUES (new.id, new.content, new.category);
+END;
+"""
+
+
+class Hit(NamedTuple):
+    category: str
+    created: str
+    snippet: str
+    score: float  # higher is better (negated FTS5 bm25)
+
+
+def fts_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 query
+
+    Every word is quoted (so AND/OR/NEAR and punctuation are literal);
+    a trailing * keeps prefix matching, e.g. squat* -> "squat"*.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class LibraryDB:
+    """
+    Notes database with FTS5 search
+
+    Args:
+        path: SQLite file (default library/notes.db)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(LIBRARY_DIR, DB_NAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # timeout: other processes may hold the write lock briefly
+        self.conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def add_note(self, category: str, content: str, created: Optional[str] = None) -> int:
+        """Insert a note; returns its id"""
+        created = created or datetime.datetime.now().isoformat(timespec="seconds")
+        with self.conn:
+            cursor = self.conn.execute("INSERT INTO notes(category, created, content) VALUES (?, ?, ?)",
+                                       (category.lower().strip(), created, content.strip()))
+        return cursor.lastrowid
+
+    def search(self, query: str, limit: int = 10) -> List[Hit]:
+        """
+        Ranked full-text search
+
+        Args:
+            query: Free text; words are ANDed, a trailing * makes a prefix
+            limit: Maximum hits
+
+        Returns:
+            Hits, best first
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        rows = self.conn.execute(
+            "SELECT n.category, n.created, snippet(notes_fts, 0, '[', ']', '...', 16), bm25(notes_fts) "
+            "FROM notes_fts JOIN notes n ON n.id = notes_fts.rowid "
+            "WHERE notes_fts MATCH ? ORDER BY bm25(notes_fts) LIMIT ?", (match, limit))
+        return [Hit(category, created, snippet, -score) for category, created, snippet, score in rows]
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM notes").fetchone()[0]
+
+    def import_text(self, library_dir: str = LIBRARY_DIR) -> int:
+        """
+        Ingest <category>.txt files, one note per non-blank line
+
+        Notes already present (same category and content) are skipped, so
+        re-running an import only adds what is new. Returns notes added.
+        """
+        added = 0
+        with self.conn:
+            for filepath in sorted(glob.glob(os.path.join(library_dir, "*.txt"))):
+                category = os.path.splitext(os.path.basename(filepath))[0].lower()
+                created = datetime.datetime.fromtimestamp(os.path.getmtime(filepath)).isoformat(timespec="seconds")
+                existing = {row[0] for row in self.conn.execute(
+                    "SELECT content FROM notes WHERE category = ?", (category,))}
+                with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        content = line.strip()
+                        if content and content not in existing:
+                            self.conn.execute("INSERT INTO notes(category, created, content) VALUES (?, ?, ?)",
+                                              (category, created, content))
+                            existing.add(content)
+                            added += 1
+        return added
+
+    def export_text(self, library_dir: str = EXPORT_DIR) -> List[str]:
+        """
+        Write every category as <category>.txt in add_note's format; returns the paths
+
+        Notes in existing target files are imported first, so overwriting a
+        live library directory keeps everything added there since the last import.
+        """
+        os.makedirs(library_dir, exist_ok=True)
+        self.import_text(library_dir)
+        paths = []
+        categories = [row[0] for row in self.conn.execute("SELECT DISTINCT category FROM notes ORDER BY category")]
+        for category in categories:
+            rows = self.conn.execute("SELECT content FROM notes WHERE category = ? ORDER BY id", (category,))
+            path = os.path.join(library_dir, category + ".txt")
+            with locked(path):
+                atomic_write(path, "".join(f"\n{content}\n" for (content,) in rows))
+            paths.append(path)
+        return paths
+
+
+def run(argv):
+    """Run a CLI command (argv without the script name) and return its output"""
+    if not argv:
+        return "Usage: python library_db.py [import|add|search|export] ..."
+    db = LibraryDB()
+    try:
+        mode = argv[0]
+        if mode == "import":
+            added = db.import_text(argv[1] if len(argv) > 1 else LIBRARY_DIR)
+            return f"[LIBRARY DB] Imported {added} notes ({db.count()} total)."
+        if mode == "export":
+            paths = db.export_text(argv[1] if len(argv) > 1 else EXPORT_DIR)
+            return f"[LIBRARY DB] Exported {len(paths)} categories: " + ", ".join(paths)
+        if mode == "add" and len(argv) >= 3:
+            db.add_note(argv[1], " ".join(argv[2:]))
+            return f"[LIBRARY DB] Note added to {argv[1].lower().strip()}."
+        if mode == "search" and len(argv) >= 2:
+            query = " ".join(argv[1:])
+            hits = db.search(query)
+            if not hits:
+                return f"[LIBRARY DB] Searching for '{query}'...\nNo matching notes found."
+            lines = [f"[LIBRARY DB] Searching for '{query}'..."]
+            for hit in hits:
+                lines.append(f"  ({hit.score:.2f}) [{hit.category} {hit.created[:10]}] {hit.snippet}")
+            return "\n".join(lines)
+        return f"Unknown command '{' '.join(argv)}'. Use import, add, search or export."
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print(run(sys.argv[1:]))
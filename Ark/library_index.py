@@ -0,0 +1,509 @@
+"""
+Library Index - Persistent inverted index for librarian notes
+
+Maps token -> note ids, where a note is one non-blank line of a
+library/*.txt file. The index lives next to the library:
+
+    library/.index.json   snapshot (files, notes, postings)
+    library/.index.log    journal of notes added since the snapshot
+
+add_note() appends one journal line instead of rewriting the snapshot;
+the journal is folded into the snapshot once it grows. Bulk imports run
+inside defer_saves() and write a single snapshot when they finish. Every lookup first
+stats the category files and re-indexes any that changed outside the
+librarian, so the index never serves stale results.
+
+Queries:
+    lookup("squat depth")    notes containing the phrase "squat depth"
+    lookup("squat* knee")    "squat"-prefixed token followed by "knee"
+    ranked("knee pain", 5)   BM25 top-5 notes containing any query term
+    fuzzy("kne pian", 5)     same, with each word widened to similarly spelled
+                             vocabulary tokens ("knee", "pain"): trigram
+                             similarity, or at most one or two typos for
+                             candidates sharing a trigram
+"""
+
+import bisect
+import contextlib
+import glob
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from file_lock import atomic_write, locked
+
+
+TOKEN_RE = re.compile(r"\w+")
+INDEX_NAME = ".index.json"
+JOURNAL_NAME = ".index.log"
+INDEX_VERSION = 2
+JOURNAL_LIMIT = 500  # journal entries before the snapshot is rewritten
+BM25_K1 = 1.2
+BM25_B = 0.75
+FUZZY_THRESHOLD = 0.3  # minimum trigram Jaccard similarity for a fuzzy match
+FUZZY_EXPANSIONS = 5   # similar tokens tried per query word
+FUZZY_MAX_EDITS = 2    # typos forgiven (1 for words of 4 letters or fewer)
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def content_hash(text: str) -> str:
+    """Hash of a note for de-duplication (case and whitespace insensitive)"""
+    return hashlib.blake2b(" ".join(text.split()).lower().encode("utf-8"), digest_size=16).hexdigest()
+
+
+def query_terms(query: str) -> List[str]:
+    """Query tokens; a word written with a trailing * stays a prefix term"""
+    return [t + "*" if raw.endswith("*") else t
+            for raw in query.lower().split() for t in tokenize(raw)]
+
+
+def trigrams(token: str) -> Set[str]:
+    """Character trigrams of a token, padded so short words and word starts count"""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Damerau-Levenshtein distance (adjacent transpositions count as one edit)
+
+    Stops early once every path exceeds limit; returns limit + 1 then.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, cb in enumerate(b, start=1):
+            cost = ca != cb
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class ScoredNote(NamedTuple):
+    score: float
+    filename: str
+    line_no: int
+    text: str
+
+
+class LibraryIndex:
+    """
+    Token -> note index over a librarian directory
+
+    notes[i] is [filename, line_no, text, token_count] (None once the file is
+    re-indexed), postings[token] is a sorted list of note ids.
+    """
+
+    def __init__(self, library_dir: str = "library"):
+        self.library_dir = library_dir
+        self.index_path = os.path.join(library_dir, INDEX_NAME)
+        self.journal_path = os.path.join(library_dir, JOURNAL_NAME)
+        self.files: Dict[str, List[int]] = {}   # filename -> [mtime_ns, size, newline_count]
+        self.notes: List[Optional[list]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.journal_entries = 0
+        self.deferred = False   # inside defer_saves(): no journal lines or snapshots until it ends
+        self._unsaved = False
+        self.live_notes = 0
+        self.total_tokens = 0   # sum of token_count over live notes (BM25 average length)
+        self._vocabulary: Optional[List[str]] = None
+        self._trigram_index: Optional[Dict[str, Set[str]]] = None   # trigram -> vocabulary tokens
+        self.load()
+
+    # --- persistence ---
+    def load(self):
+        """Load snapshot + journal (a missing or corrupt index starts empty)"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                raise ValueError("index version changed")
+            self.files = data["files"]
+            self.notes = data["notes"]
+            self.postings = data["postings"]
+        except (OSError, ValueError, KeyError):
+            self.files, self.notes, self.postings = {}, [], {}
+        live = [note for note in self.notes if note is not None]
+        self.live_notes = len(live)
+        self.total_tokens = sum(note[3] for note in live)
+
+        self.journal_entries = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from a crash; refresh() repairs the file
+                    self._add_note(entry["file"], entry["line"], entry["text"])
+                    self.files[entry["file"]] = entry["stat"]
+                    self.journal_entries += 1
+        self._vocabulary = None
+        self._trigram_index = None
+
+    def save(self):
+        """Write a fresh snapshot and clear the journal"""
+        if self.deferred:
+            self._unsaved = True
+            return
+        self._compact_notes()
+        data = {"version": INDEX_VERSION, "files": self.files,
+                "notes": self.notes, "postings": self.postings}
+        with locked(self.index_path):
+            atomic_write(self.index_path, json.dumps(data, separators=(",", ":")))
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+        self.journal_entries = 0
+        self._unsaved = False
+
+    @contextlib.contextmanager
+    def defer_saves(self):
+        """
+        Bulk updates: skip the journal and write one snapshot at the end
+
+        If the process dies first, the category files are newer than the
+        snapshot, so the next refresh() re-indexes them.
+        """
+        if self.deferred:
+            yield
+            return
+        self.deferred = True
+        try:
+            yield
+        finally:
+            self.deferred = False
+            if self._unsaved:
+                self.save()
+
+    def _journal(self, entries: List[Tuple[str, int, str]]):
+        """Log added notes; a batch too large for the journal goes straight into a new snapshot"""
+        if self.deferred:
+            self._unsaved = True
+            return
+        if self.journal_entries + len(entries) >= JOURNAL_LIMIT:
+            self.save()
+            return
+        lines = [json.dumps({"file": filename, "line": line_no, "text": text, "stat": self.files[filename]}) + "\n"
+                 for filename, line_no, text in entries]
+        with locked(self.index_path), open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+        self.journal_entries += len(entries)
+
+    def _compact_notes(self):
+        """Drop holes left by re-indexed files and renumber postings"""
+        if all(note is not None for note in self.notes):
+            return
+        remap = {}
+        notes = []
+        for old_id, note in enumerate(self.notes):
+            if note is not None:
+                remap[old_id] = len(notes)
+                notes.append(note)
+        self.notes = notes
+        self.postings = {token: [remap[i] for i in ids if i in remap]
+                         for token, ids in self.postings.items()}
+        self.postings = {token: ids for token, ids in self.postings.items() if ids}
+        self._vocabulary = None
+
+    # --- indexing ---
+    def _add_note(self, filename: str, line_no: int, text: str) -> int:
+        note_id = len(self.notes)
+        tokens = tokenize(text)
+        self.notes.append([filename, line_no, text, len(tokens)])
+        self.live_notes += 1
+        self.total_tokens += len(tokens)
+        for token in set(tokens):
+            ids = self.postings.get(token)
+            if ids is None:
+                self.postings[token] = [note_id]
+                self._token_added(token)
+            else:
+                ids.append(note_id)  # ids only grow, so the list stays sorted
+        return note_id
+
+    def _drop_file(self, filename: str):
+        for note_id, note in enumerate(self.notes):
+            if note is not None and note[0] == filename:
+                for token in set(tokenize(note[2])):
+                    ids = self.postings.get(token)
+                    if ids is not None:
+                        position = bisect.bisect_left(ids, note_id)
+                        if position < len(ids) and ids[position] == note_id:
+                            del ids[position]
+                        if not ids:
+                            del self.postings[token]
+                            self._token_removed(token)
+                self.notes[note_id] = None
+                self.live_notes -= 1
+                self.total_tokens -= note[3]
+        self.files.pop(filename, None)
+
+    def _token_added(self, token: str):
+        self._vocabulary = None
+        if self._trigram_index is not None:
+            for gram in trigrams(token):
+                self._trigram_index.setdefault(gram, set()).add(token)
+
+    def _token_removed(self, token: str):
+        self._vocabulary = None
+        if self._trigram_index is not None:
+            for gram in trigrams(token):
+                tokens = self._trigram_index.get(gram)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigram_index[gram]
+
+    def _index_file(self, filename: str):
+        path = os.path.join(self.library_dir, filename)
+        self._drop_file(filename)
+        stat = os.stat(path)
+        newlines = 0
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line_no, line in enumerate(f, start=1):
+                newlines += line.endswith("\n")
+                if line.strip():
+                    self._add_note(filename, line_no, line.strip())
+        self.files[filename] = [stat.st_mtime_ns, stat.st_size, newlines]
+
+    def _current_files(self) -> Dict[str, os.stat_result]:
+        return {os.path.basename(path): os.stat(path)
+                for path in glob.glob(os.path.join(self.library_dir, "*.txt"))}
+
+    def refresh(self) -> bool:
+        """Re-index files changed outside the librarian; returns True if anything changed"""
+        current = self._current_files()
+        changed = False
+        for filename in list(self.files):
+            if filename not in current:
+                self._drop_file(filename)
+                changed = True
+        for filename, stat in current.items():
+            known = self.files.get(filename)
+            if known is None or known[0] != stat.st_mtime_ns or known[1] != stat.st_size:
+                self._index_file(filename)
+                changed = True
+        if changed:
+            self.save()
+        return changed
+
+    def is_fresh(self) -> bool:
+        """True if no category file changed since it was indexed"""
+        current = self._current_files()
+        if set(current) != set(self.files):
+            return False
+        return all(self.files[name][:2] == [stat.st_mtime_ns, stat.st_size] for name, stat in current.items())
+
+    def notes_appended(self, filename: str, contents: Sequence[str],
+                       stat_before: Optional[Tuple[int, int]]) -> List[Tuple[str, int, str]]:
+        """
+        Record notes the librarian just appended, each written as "\\n{content}\\n"
+
+        Args:
+            filename: Category file name (e.g. "notes.txt")
+            contents: Note texts as written, in order
+            stat_before: (mtime_ns, size) of the file before the append, or None if it was new
+
+        Returns:
+            The (filename, line_no, text) notes added ([] if the file had to be re-indexed)
+        """
+        known = self.files.get(filename)
+        if stat_before is not None and (known is None or known[:2] != list(stat_before)):
+            self._index_file(filename)  # changed behind our back: rebuild this file only
+            self.save()
+            return []
+        newlines = known[2] if known else 0
+        entries = []
+        for content in contents:
+            for offset, line in enumerate(content.split("\n")):
+                if line.strip():
+                    entries.append((filename, newlines + 2 + offset, line.strip()))
+            newlines += content.count("\n") + 2
+        stat = os.stat(os.path.join(self.library_dir, filename))
+        self.files[filename] = [stat.st_mtime_ns, stat.st_size, newlines]
+        for _, line_no, text in entries:
+            self._add_note(filename, line_no, text)
+        self._journal(entries)
+        return entries
+
+    # --- queries ---
+    @property
+    def vocabulary(self) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        return self._vocabulary
+
+    @property
+    def trigram_index(self) -> Dict[str, Set[str]]:
+        """trigram -> vocabulary tokens; built on first fuzzy query, then kept up to date"""
+        if self._trigram_index is None:
+            self._trigram_index = {}
+            for token in self.postings:
+                for gram in trigrams(token):
+                    self._trigram_index.setdefault(gram, set()).add(token)
+        return self._trigram_index
+
+    def similar_tokens(self, word: str, threshold: float = FUZZY_THRESHOLD,
+                       limit: int = FUZZY_EXPANSIONS) -> List[Tuple[float, str]]:
+        """
+        Vocabulary tokens spelled like word
+
+        Tokens sharing at least one trigram are candidates; only those are
+        compared, so the cost follows the trigram postings, not the vocabulary.
+        A candidate scores its trigram Jaccard similarity, or 1 - edits/length
+        when it is within FUZZY_MAX_EDITS typos: swapped letters ("pian" vs
+        "pain") break most trigrams of a short word but are a single edit.
+
+        Returns:
+            (similarity, token) pairs, most similar first
+        """
+        grams = trigrams(word)
+        index = self.trigram_index
+        max_edits = 1 if len(word) <= 4 else FUZZY_MAX_EDITS
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for token in index.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        matches = []
+        for token, count in shared.items():
+            similarity = count / (len(grams) + len(trigrams(token)) - count)
+            if similarity < threshold:
+                edits = edit_distance(word, token, max_edits)
+                if edits <= max_edits:
+                    similarity = max(similarity, 1 - edits / max(len(word), len(token)))
+            if similarity >= threshold:
+                matches.append((similarity, token))
+        return heapq.nlargest(limit, matches)
+
+    def _expand(self, term: str) -> List[str]:
+        """Vocabulary tokens matched by a term (itself, or every token with its prefix)"""
+        if not term.endswith("*"):
+            return [term] if term in self.postings else []
+        prefix = term[:-1]
+        vocabulary = self.vocabulary
+        tokens = []
+        for token in vocabulary[bisect.bisect_left(vocabulary, prefix):]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    def _ids_for(self, term: str) -> List[int]:
+        if not term.endswith("*"):
+            return self.postings.get(term, [])
+        ids = set()
+        for token in self._expand(term):
+            ids.update(self.postings[token])
+        return sorted(ids)
+
+    @staticmethod
+    def _matches_phrase(tokens: List[str], terms: List[str]) -> bool:
+        width = len(terms)
+        for start in range(len(tokens) - width + 1):
+            if all(tokens[start + k] == term or (term.endswith("*") and tokens[start + k].startswith(term[:-1]))
+                   for k, term in enumerate(terms)):
+                return True
+        return False
+
+    def lookup(self, query: str) -> List[Tuple[str, int, str]]:
+        """
+        Notes matching a phrase/prefix query, in file and line order
+
+        Returns:
+            (filename, line_no, text) tuples
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        # Rarest term first keeps the intersection small
+        candidates = None
+        for ids in sorted((self._ids_for(term) for term in terms), key=len):
+            candidates = set(ids) if candidates is None else candidates.intersection(ids)
+            if not candidates:
+                return []
+
+        results = []
+        for note_id in sorted(candidates):
+            filename, line_no, text, _ = self.notes[note_id]
+            if len(terms) == 1 or self._matches_phrase(tokenize(text), terms):
+                results.append((filename, line_no, text))
+        return results
+
+    def ranked(self, query: str, k: int = 5) -> List[ScoredNote]:
+        """
+        BM25 top-k over notes containing any query term
+
+        Only notes in the query terms' postings are scored, and a heap keeps
+        the best k, so cost follows the candidate count, not library size.
+
+        Args:
+            query: Free text (a trailing * makes a word a prefix)
+            k: Number of results
+
+        Returns:
+            ScoredNote tuples, best first
+        """
+        weights: Dict[str, float] = {}   # vocabulary token -> idf x query-term multiplicity
+        for term in query_terms(query):
+            ids = self._ids_for(term)
+            if ids:
+                for token in self._expand(term):
+                    weights[token] = weights.get(token, 0.0) + self._idf(len(ids))
+        return self._top_k(weights, k)
+
+    def fuzzy(self, query: str, k: int = 5, threshold: float = FUZZY_THRESHOLD) -> List[ScoredNote]:
+        """
+        Typo-tolerant ranked search
+
+        Each query word is replaced by the vocabulary tokens whose trigram
+        similarity reaches threshold; BM25 weights are scaled by that similarity,
+        so exact spellings still rank first.
+        """
+        weights: Dict[str, float] = {}
+        for term in query_terms(query):
+            for similarity, token in self.similar_tokens(term.rstrip("*"), threshold):
+                weight = similarity * self._idf(len(self.postings[token]))
+                weights[token] = max(weights.get(token, 0.0), weight)
+        return self._top_k(weights, k)
+
+    def _idf(self, document_frequency: int) -> float:
+        return math.log(1 + (self.live_notes - document_frequency + 0.5) / (document_frequency + 0.5))
+
+    def _top_k(self, weights: Dict[str, float], k: int) -> List[ScoredNote]:
+        """BM25-score the notes containing any weighted token; best k first"""
+        if not self.live_notes or not weights:
+            return []
+        average_length = self.total_tokens / self.live_notes or 1.0
+        candidates = set()
+        for token in weights:
+            candidates.update(self.postings[token])
+
+        def scored():
+            for note_id in candidates:
+                filename, line_no, text, length = self.notes[note_id]
+                counts: Dict[str, int] = {}
+                for token in tokenize(text):
+                    if token in weights:
+                        counts[token] = counts.get(token, 0) + 1
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                score = sum(weights[token] * tf * (BM25_K1 + 1) / (tf + norm) for token, tf in counts.items())
+                yield ScoredNote(score, filename, line_no, text)
+
+        return heapq.nlargest(k, scored())
+
+    def notes_in(self, filenames: Iterable[str]) -> List[Tuple[str, int, str]]:
+        wanted = set(filenames)
+        return [tuple(note[:3]) for note in self.notes if note is not None and note[0] in wanted]
@@ -1,15 +1,34 @@
-from googlesearch import search
-import requests
-from bs4 import BeautifulSoup
 import sys
+import os
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http_cache import Fetched, PageCache
+
+# googlesearch, requests and bs4 are imported on first use so the kernel
+# can import this module (and the CLI can print usage) without paying for them.
+
+OFFLINE = os.environ.get("ARK_OFFLINE") == "1"  # read only from the page cache
+PAGE_CACHE = PageCache()  # cache/pages/, extracted text per URL
+TEXT_LIMIT = 2000  # characters of page text returned per read
+RESEARCH_PAGES = 5  # search results fetched by research
+FETCH_WORKERS = 5  # concurrent page fetches
+PER_HOST_LIMIT = 2  # concurrent fetches per host
+PAGE_DIGEST_CHARS = 1200  # new text kept per page in a research digest
+HOST_SLOTS = {}
+HOST_SLOTS_LOCK = threading.Lock()
+
+def search_results(query, num_results=3):
+    """(title, url, description) tuples for the top Google results"""
+    from googlesearch import search
+    return [(j.title, j.url, j.description) for j in search(query, num_results=num_results, advanced=True)]
 
 def google_search(query):
     print(f"[RESEARCHER] Searching Google for: {query}")
-    results = []
     # Get top 3 links
     try:
-        for j in search(query, num_results=3, advanced=True):
-            results.append((j.title, j.url, j.description))
+        results = search_results(query, 3)
     except Exception as e:
         return f"Search Error: {e}"
     
@@ -18,32 +37,119 @@ def google_search(query):
         output += f"[{i+1}] {title}\n    {desc}\n    URL: {url}\n\n"
     return output
 
-def read_url(url):
+def extract_text(html):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Kill javascript and css
+    for script in soup(["script", "style"]):
+        script.decompose()
+        
+    text = soup.get_text()
+    # Clean up whitespace
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def fetch_page(url, extra_headers=None):
+    """GET url (conditional when extra_headers carry validators) and extract its text"""
+    import requests
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
+    headers.update(extra_headers or {})
+    response = requests.get(url, headers=headers, timeout=10)
+    if response.status_code == 304:
+        return Fetched(304, dict(response.headers), None)
+    return Fetched(response.status_code, dict(response.headers), extract_text(response.text))
+
+def read_url(url, offline=None):
+    """Page text, served from the on-disk page cache when it is still fresh (or always, offline)"""
+    offline = OFFLINE if offline is None else offline
     print(f"[RESEARCHER] Reading content from: {url}")
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Kill javascript and css
-        for script in soup(["script", "style"]):
-            script.decompose()
-            
-        text = soup.get_text()
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        return f"--- CONTENT OF {url} ---\n{text[:2000]}..." # Limit to 2000 chars
+        page = PAGE_CACHE.get(url, lambda headers: fetch_page(url, headers), offline=offline)
+        if page.source == "uncached":
+            return f"Offline: {url} is not in the page cache."
+        source = "" if page.source == "fetched" else f" ({page.source}, from cache)"
+        return f"--- CONTENT OF {url}{source} ---\n{page.text[:TEXT_LIMIT]}..." # Limit to 2000 chars
     except Exception as e:
         return f"Error reading URL: {e}"
 
-if __name__ == "__main__":
-    mode = sys.argv[1]
-    query = " ".join(sys.argv[2:])
+def _host_slot(url):
+    """Semaphore limiting concurrent fetches to url's host"""
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    with HOST_SLOTS_LOCK:
+        if host not in HOST_SLOTS: HOST_SLOTS[host] = threading.BoundedSemaphore(PER_HOST_LIMIT)
+        return HOST_SLOTS[host]
+
+def _fetch_cached(url, offline=False):
+    """Page text through the page cache, holding a per-host slot while on the network"""
+    def fetch(headers):
+        with _host_slot(url):
+            return fetch_page(url, headers)
+    return PAGE_CACHE.get(url, fetch, offline=offline).text
+
+def research(query, num_pages=RESEARCH_PAGES, offline=None):
+    """
+    Search, fetch the top pages concurrently (cached, per-host limited), extract
+    them in parallel and return one digest with lines repeated across pages removed
+    """
+    offline = OFFLINE if offline is None else offline
+    if offline:
+        return (f"Offline: research needs a web search for '{query}'. "
+                f"Use 'python researcher.py read URL --offline' for pages already in the cache.")
+    print(f"[RESEARCHER] Researching: {query}")
+    started = time.perf_counter()
+    try:
+        results = search_results(query, num_pages)
+    except Exception as e:
+        return f"Search Error: {e}"
+    unique = []
+    for result in results:  # drop repeated URLs, keep rank order
+        if result[1] not in [url for _, url, _ in unique]: unique.append(result)
+    results = unique
+    
+    # Fetch + extract on a pool; one slow site doesn't hold up the others
+    with ThreadPoolExecutor(max_workers=max(1, min(FETCH_WORKERS, len(results)))) as pool:
+        futures = [pool.submit(_fetch_cached, url, offline) for _, url, _ in results]
+        pages = []
+        for future in futures:
+            try: pages.append(future.result())
+            except Exception as e: pages.append(f"(could not read page: {e})")
+    
+    seen = set()
+    sections = []
+    for i, ((title, url, desc), text) in enumerate(zip(results, pages)):
+        kept = []
+        budget = PAGE_DIGEST_CHARS
+        for line in text.splitlines():
+            key = " ".join(line.split()).lower()
+            if not key or key in seen: continue  # boilerplate and quotes shared across pages
+            seen.add(key)
+            kept.append(line.strip())
+            budget -= len(line)
+            if budget <= 0: break
+        sections.append(f"[{i+1}] {title}\n    URL: {url}\n" + ("\n".join(kept) or desc))
+    elapsed = time.perf_counter() - started
+    return (f"--- RESEARCH DIGEST FOR '{query}' ({len(results)} pages in {elapsed:.1f}s) ---\n\n"
+            + "\n\n".join(sections))
+
+def run(argv):
+    """Run a CLI command (argv without the script name) and return its output"""
+    offline = "--offline" in argv
+    argv = [arg for arg in argv if arg != "--offline"]
+    if len(argv) < 2:
+        return "Usage: python researcher.py [search|read|research] [query/url] [--offline]"
+    mode = argv[0]
+    query = " ".join(argv[1:])
     
     if mode == "search":
-        print(google_search(query))
+        if offline or OFFLINE: return f"Offline: cannot search the web for '{query}'."
+        return google_search(query)
     elif mode == "read":
-        print(read_url(query))
\ No newline at end of file
+        return read_url(query, offline=offline or None)
+    elif mode == "research":
+        return research(query, offline=offline or None)
+    return f"Unknown mode '{mode}'. Use search, read or research."
+
+if __name__ == "__main__":
+    print(run(sys.argv[1:]))
@@ -0,0 +1,295 @@
+"""
+Semantic Index - Embedding search over librarian notes
+
+Each note (a non-blank library line, as tracked by LibraryIndex) gets an
+embedding, from Ollama's /api/embed endpoint when an embedding model is
+available, or otherwise from a local hashing vectorizer. Vectors are
+L2-normalised rows of a float32 matrix, so cosine similarity is a single
+matrix-vector product.
+
+On disk, next to the library:
+    library/.vectors.f32     raw float32 rows (append-only)
+    library/.vectors.jsonl   header line, then one {"file", "line", "hash"} per row
+
+Only notes whose text hash is not stored yet are embedded. When files are
+rewritten, the surviving vectors are reused and the store is compacted.
+
+The embedder is probed only when the store is created; afterwards the one
+named in the header is always used. If it is unreachable (Ollama down),
+embedding raises OSError and the store is left as it was, never
+re-embedded with a different model.
+
+Requires numpy (optional for the rest of Ark: pip install numpy).
+"""
+
+import hashlib
+import json
+import math
+import os
+import urllib.request
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from file_lock import atomic_write, locked
+from library_index import tokenize
+
+
+VECTORS_NAME = ".vectors.f32"
+META_NAME = ".vectors.jsonl"
+OLLAMA_URL = "http://localhost:11434"
+EMBED_MODEL = "nomic-embed-text"
+HASH_DIM = 256
+EMBED_BATCH = 64
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class HashingEmbedder:
+    """
+    Model-free fallback: signed feature hashing of words and word bigrams
+
+    Matches shared vocabulary rather than meaning, but needs no model
+    and no corpus statistics, so vectors never have to be recomputed.
+    """
+
+    def __init__(self, dim: int = HASH_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> Dict[int, float]:
+        tokens = tokenize(text)
+        counts: Dict[str, int] = {}
+        for feature in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+            counts[feature] = counts.get(feature, 0) + 1
+        vector: Dict[int, float] = {}
+        for feature, count in counts.items():
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            slot = h % self.dim
+            sign = 1.0 if (h >> 63) & 1 else -1.0
+            vector[slot] = vector.get(slot, 0.0) + sign * (1.0 + math.log(count))
+        return vector
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for slot, value in self._features(text).items():
+                matrix[row, slot] = value
+        return matrix
+
+
+class OllamaEmbedder:
+    """
+    Embeddings from a local Ollama model (POST /api/embed)
+
+    Args:
+        model: Embedding model name (e.g. nomic-embed-text)
+        url: Ollama base URL
+    """
+
+    def __init__(self, model: str = EMBED_MODEL, url: str = OLLAMA_URL, timeout: float = 30.0):
+        self.model = model
+        self.url = url
+        self.timeout = timeout
+        self.name = f"ollama-{model}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows = []
+        for start in range(0, len(texts), EMBED_BATCH):
+            body = json.dumps({"model": self.model, "input": list(texts[start:start + EMBED_BATCH])}).encode("utf-8")
+            request = urllib.request.Request(f"{self.url}/api/embed", data=body,
+                                             headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                rows.extend(json.load(response)["embeddings"])
+        return np.asarray(rows, dtype=np.float32).reshape(len(texts), -1)
+
+
+def default_embedder():
+    """Ollama when the embedding model answers, otherwise the hashing vectorizer"""
+    embedder = OllamaEmbedder(timeout=2.0)
+    try:
+        embedder.embed(["ping"])
+        embedder.timeout = 30.0
+        return embedder
+    except Exception:
+        return HashingEmbedder()
+
+
+def embedder_for(name: str):
+    """The embedder that produced vectors stored under name (header "embedder" field)"""
+    if name.startswith("hashing-"):
+        return HashingEmbedder(int(name[len("hashing-"):]))
+    if name.startswith("ollama-"):
+        return OllamaEmbedder(name[len("ollama-"):])
+    raise ValueError(f"Unknown embedder '{name}'")
+
+
+def stored_embedder(library_dir: str = "library"):
+    """Embedder recorded in an existing store, or None if there is no readable store"""
+    try:
+        with open(os.path.join(library_dir, META_NAME), "r", encoding="utf-8") as f:
+            return embedder_for(json.loads(f.readline())["embedder"])
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class SemanticHit(NamedTuple):
+    score: float
+    filename: str
+    line_no: int
+    text: str
+
+
+class SemanticIndex:
+    """
+    float32 embedding matrix for library notes
+
+    Args:
+        library_dir: Librarian directory (files are stored beside the notes)
+        embedder: Object with .name and .embed(texts) -> (n, dim) array;
+            defaults to the store's own embedder, or default_embedder() for a new store
+    """
+
+    def __init__(self, library_dir: str = "library", embedder=None):
+        self.library_dir = library_dir
+        self.vectors_path = os.path.join(library_dir, VECTORS_NAME)
+        self.meta_path = os.path.join(library_dir, META_NAME)
+        self.embedder = embedder or stored_embedder(library_dir) or default_embedder()
+        self.rows: List[Tuple[str, int, str]] = []   # (filename, line_no, text hash) per matrix row
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.texts: Dict[Tuple[str, int], str] = {}
+        self.synced_files: Optional[str] = None
+        self.load()
+
+    @staticmethod
+    def exists(library_dir: str = "library") -> bool:
+        return os.path.exists(os.path.join(library_dir, META_NAME))
+
+    # --- persistence ---
+    def load(self):
+        """Read the stored matrix; a different embedder or a torn store starts empty"""
+        self.rows, self.matrix = [], np.zeros((0, 0), dtype=np.float32)
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                rows = [json.loads(line) for line in f if line.strip()]
+            if header.get("embedder") != self.embedder.name:
+                return
+            dim = header["dim"]
+            matrix = np.fromfile(self.vectors_path, dtype=np.float32)
+        except (OSError, ValueError, KeyError):
+            return
+        count = min(len(rows), matrix.size // dim)  # a crash can leave either file one row ahead
+        self.rows = [(row["file"], row["line"], row["hash"]) for row in rows[:count]]
+        self.matrix = matrix[:count * dim].reshape(count, dim)
+
+    def _rewrite(self):
+        header = json.dumps({"embedder": self.embedder.name, "dim": self.matrix.shape[1]})
+        lines = [header] + [json.dumps({"file": f, "line": n, "hash": h}) for f, n, h in self.rows]
+        with locked(self.meta_path):
+            tmp_path = self.vectors_path + ".tmp"
+            self.matrix.tofile(tmp_path)
+            os.replace(tmp_path, self.vectors_path)
+            atomic_write(self.meta_path, "\n".join(lines) + "\n")
+
+    def _append(self, rows: List[Tuple[str, int, str]], vectors: np.ndarray):
+        if not len(self.rows):
+            self.rows, self.matrix = list(rows), vectors
+            self._rewrite()
+            return
+        with locked(self.meta_path):
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self.meta_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps({"file": fn, "line": n, "hash": h}) + "\n" for fn, n, h in rows)
+        self.rows.extend(rows)
+        self.matrix = np.vstack([self.matrix, vectors])
+
+    # --- updates ---
+    def add(self, notes: Sequence[Tuple[str, int, str]]):
+        """Embed and append (filename, line_no, text) notes"""
+        if not notes:
+            return
+        vectors = normalize(self.embedder.embed([text for _, _, text in notes]))
+        for filename, line_no, text in notes:
+            self.texts[(filename, line_no)] = text
+        self._append([(f, n, text_hash(t)) for f, n, t in notes], vectors)
+
+    def sync(self, index) -> int:
+        """
+        Bring the matrix in line with a LibraryIndex
+
+        Returns:
+            Number of notes that had to be embedded
+        """
+        signature = json.dumps(index.files, sort_keys=True)
+        if signature == self.synced_files:
+            return 0
+        notes = [note[:3] for note in index.notes if note is not None]
+        self.texts = {(f, n): t for f, n, t in notes}
+        wanted = [(f, n, text_hash(t)) for f, n, t in notes]
+
+        if set(wanted) == set(self.rows):
+            self.synced_files = signature
+            return 0
+        stored = {key: row for row, key in enumerate(self.rows)}
+        by_hash = {key[2]: row for key, row in stored.items()}
+        new = [(f, n, t) for (f, n, t), key in zip(notes, wanted) if key not in stored]
+        wanted_keys = set(wanted)
+        if all(key in wanted_keys for key in self.rows):
+            self.add(new)  # only additions: append
+        else:
+            # Files were rewritten: keep vectors whose text survived, embed the rest, compact.
+            # Embed before touching rows/matrix so a failing embedder leaves the store consistent.
+            reuse = [(key, by_hash[key[2]]) for key in wanted if key[2] in by_hash]
+            reused = {key for key, _ in reuse}
+            new = [(f, n, t) for (f, n, t), key in zip(notes, wanted) if key not in reused]
+            vectors = normalize(self.embedder.embed([t for _, _, t in new])) if new else None
+            dim = self.matrix.shape[1] if self.matrix.size else None
+            self.rows = [key for key, _ in reuse]
+            self.matrix = self.matrix[[row for _, row in reuse]] if reuse else np.zeros((0, dim or 1), dtype=np.float32)
+            if new:
+                self.rows.extend((f, n, text_hash(t)) for f, n, t in new)
+                self.matrix = np.vstack([self.matrix, vectors]) if reuse else vectors
+            self._rewrite()
+        self.synced_files = signature
+        return len(new)
+
+    def note_added(self, index, notes: Sequence[Tuple[str, int, str]], files_before: str):
+        """
+        Embed notes that add_note() just appended
+
+        Args:
+            index: The LibraryIndex after the append
+            notes: The (filename, line_no, text) notes that were added
+            files_before: json.dumps(index.files, sort_keys=True) before the append
+        """
+        if self.synced_files != files_before or not notes:
+            self.sync(index)  # out of step, or the file was re-indexed: full comparison
+            return
+        self.add(notes)
+        self.synced_files = json.dumps(index.files, sort_keys=True)
+
+    # --- queries ---
+    def search(self, query: str, k: int = 5) -> List[SemanticHit]:
+        """Top-k notes by cosine similarity to query, best first"""
+        if not self.rows:
+            return []
+        q = normalize(self.embedder.embed([query]))[0]
+        scores = self.matrix @ q
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        hits = []
+        for row in top:
+            filename, line_no, _ = self.rows[row]
+            hits.append(SemanticHit(float(scores[row]), filename, line_no, self.texts.get((filename, line_no), "")))
+        return hits
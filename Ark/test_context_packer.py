@@ -0,0 +1,65 @@
+"""
+Tests for context_packer (run: python -m unittest test_context_packer)
+"""
+
+import unittest
+
+from context_packer import ContextPacker, estimate_tokens, head_tail, tool_message
+
+
+FILE = "FILE CONTENT (a.txt):\n" + "x" * 400
+
+
+def conversation(rounds):
+    messages = [{'role': 'system', 'content': 'sys ' * 300},
+                {'role': 'user', 'content': 'read a.txt'}]
+    for _ in range(rounds):
+        messages.append({'role': 'assistant', 'content': 'READ: a.txt'})
+        messages.append(tool_message([FILE]))
+    messages.append({'role': 'user', 'content': 'again?'})
+    return messages
+
+
+class PackTest(unittest.TestCase):
+
+    def test_repeated_output_is_referenced(self):
+        packed = ContextPacker().pack(conversation(2))
+        self.assertIn("xxxx", packed[3]['content'])
+        self.assertIn("[same output as earlier: FILE CONTENT (a.txt):]", packed[5]['content'])
+
+    def test_dropped_round_takes_no_reference_with_it(self):
+        packer = ContextPacker(context_tokens=600, reply_tokens=200)
+        packed = packer.pack(conversation(2))
+        self.assertEqual(len(packed), 5)
+        self.assertIn("xxxx", packed[3]['content'])
+        self.assertNotIn("same output as earlier", packed[3]['content'])
+        self.assertLessEqual(packer.last_stats['after'], packer.budget)
+
+    def test_system_trim_fits_budget(self):
+        packer = ContextPacker(context_tokens=600, reply_tokens=200)
+        packer.pack([{'role': 'system', 'content': 'sys ' * 1000},
+                     {'role': 'user', 'content': 'q'}])
+        self.assertLessEqual(packer.last_stats['after'], packer.budget)
+
+    def test_original_messages_untouched(self):
+        messages = conversation(3)
+        before = [dict(m) for m in messages]
+        ContextPacker(context_tokens=600, reply_tokens=200).pack(messages)
+        self.assertEqual(messages, before)
+
+
+class HeadTailTest(unittest.TestCase):
+
+    def test_fits_max_tokens(self):
+        for max_tokens in (20, 50, 200):
+            for length in (10, 100, 1000, 100000):
+                text = "y" * length
+                self.assertLessEqual(estimate_tokens(head_tail(text, max_tokens)),
+                                     max(max_tokens, 1))
+
+    def test_short_text_unchanged(self):
+        self.assertEqual(head_tail("short", 10), "short")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Tests for fact_engine (run: python -m unittest test_fact_engine)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fact_engine import FactEngine, extract_facts
+
+
+class ExtractFactsTest(unittest.TestCase):
+
+    def test_nested_facts_are_kept(self):
+        facts = [fact for _, fact in extract_facts("My name is Konsta, I live in Helsinki and I like pizza.")]
+        self.assertEqual(facts, ["name is konsta", "lives in helsinki and i like pizza", "likes pizza"])
+
+    def test_no_trigger_word(self):
+        self.assertEqual(extract_facts("what time is it"), [])
+
+    def test_single_valued_keys(self):
+        self.assertEqual(extract_facts("I am 29 years old"), [("age", "is 29 years old")])
+
+
+class FactEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_facts_")
+        self.path = os.path.join(self.dir, "about_user.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def lines(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+
+    def test_new_facts_append_on_flush(self):
+        engine = FactEngine(self.path)
+        self.assertEqual(engine.learn("My name is Alex"), ["name is alex"])
+        self.assertFalse(os.path.exists(self.path))
+        engine.flush()
+        self.assertEqual(self.lines(), ["name is alex"])
+
+    def test_known_fact_is_not_relearned(self):
+        engine = FactEngine(self.path)
+        engine.learn("I like pizza")
+        engine.flush()
+        self.assertEqual(engine.learn("i like pizza."), [])
+
+    def test_changed_value_replaces_in_place(self):
+        engine = FactEngine(self.path)
+        engine.learn("My name is Alex. I live in Turku")
+        engine.flush()
+        self.assertEqual(engine.learn("I live in Helsinki"), ["lives in helsinki"])
+        engine.flush()
+        self.assertEqual(self.lines(), ["name is alex", "lives in helsinki"])
+
+    def test_flush_merges_outside_additions(self):
+        engine = FactEngine(self.path)
+        engine.learn("I live in Turku")
+        engine.flush()
+        engine.learn("I live in Oulu")
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\nnote added by the librarian\n")
+        engine.flush()
+        self.assertEqual(self.lines(), ["lives in oulu", "note added by the librarian"])
+
+    def test_reload_after_outside_edit(self):
+        engine = FactEngine(self.path)
+        engine.learn("My name is Alex")
+        engine.flush()
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("name is sam\n")
+        os.utime(self.path, ns=(1, 1))  # make sure the mtime differs
+        self.assertEqual(engine.learn("My name is Sam"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
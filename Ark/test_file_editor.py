@@ -0,0 +1,67 @@
+"""
+Tests for file_editor.replace_in_file and the kernel's UPDATE wrapper
+(run: python -m unittest test_file_editor)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from file_editor import replace_in_file
+
+
+class ReplaceInFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_editor_")
+        self.path = os.path.join(self.dir, "file.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_replaces_all_and_reports_offsets(self):
+        self.write(b"a cat and a cat and a cat")
+        self.assertEqual(replace_in_file(self.path, "cat", "dog"), [(2, 5), (12, 15), (22, 25)])
+        self.assertEqual(self.read(), b"a dog and a dog and a dog")
+
+    def test_count_limits_replacements(self):
+        self.write(b"x x x")
+        self.assertEqual(replace_in_file(self.path, "x", "yy", count=2), [(0, 1), (2, 3)])
+        self.assertEqual(self.read(), b"yy yy x")
+
+    def test_offsets_are_bytes(self):
+        self.write("äiti ja äiti".encode("utf-8"))
+        self.assertEqual(replace_in_file(self.path, "äiti", "isä"), [(0, 5), (9, 14)])
+        self.assertEqual(self.read().decode("utf-8"), "isä ja isä")
+
+    def test_not_found_leaves_file(self):
+        self.write(b"hello")
+        mtime = os.stat(self.path).st_mtime_ns
+        self.assertEqual(replace_in_file(self.path, "bye", "x"), [])
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+        self.assertEqual(os.listdir(self.dir), ["file.txt"])  # no temp file left behind
+
+    def test_empty_needle_rejected(self):
+        self.write(b"hello")
+        with self.assertRaises(ValueError):
+            replace_in_file(self.path, "", "x")
+
+    def test_crlf_fallback_in_kernel_update(self):
+        import kernel
+        self.write(b"first line\r\nsecond line\r\n")
+        result = kernel.update_file(self.path, "first line\\nsecond", "one\\ntwo")
+        self.assertTrue(result.startswith("SUCCESS"), result)
+        self.assertEqual(self.read(), b"one\r\ntwo line\r\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Tests for file_lock.atomic_write (run: python -m unittest test_file_lock)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from file_lock import atomic_write
+
+
+@unittest.skipIf(os.name == "nt", "POSIX permissions")
+class AtomicWriteModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_lock_")
+        self.path = os.path.join(self.dir, "file.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def mode(self, path):
+        return os.stat(path).st_mode & 0o777
+
+    def test_new_file_gets_open_default_mode(self):
+        reference = os.path.join(self.dir, "reference.txt")
+        with open(reference, "w") as f:
+            f.write("x")
+        atomic_write(self.path, "hello")
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "hello")
+        self.assertEqual(self.mode(self.path), self.mode(reference))
+
+    def test_existing_file_keeps_mode(self):
+        with open(self.path, "w") as f:
+            f.write("old")
+        os.chmod(self.path, 0o640)
+        atomic_write(self.path, "new")
+        self.assertEqual(self.mode(self.path), 0o640)
+        self.assertEqual(os.listdir(self.dir), ["file.txt"])  # no temp file left behind
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests for file_reader's bounded reads and search (run: python -m unittest test_file_reader)
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from file_reader import read_lines, search_file
+
+
+class FileReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_reader_")
+        self.path = os.path.join(self.dir, "file.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, data):
+        with open(self.path, "wb") as f:
+            f.write(data)
+
+    def test_read_lines_range(self):
+        self.write(b"a\nb\nc\n")
+        self.assertEqual(read_lines(self.path, 2, 9), ("     2  b\n     3  c\n", None))
+        self.assertEqual(read_lines(self.path, 5, 6), ("", None))
+
+    def test_read_lines_stops_at_max_bytes(self):
+        self.write(b"x" * 100000 + b"\nnext\n")
+        text, stopped = read_lines(self.path, 1, 1, max_bytes=1000)
+        self.assertEqual(stopped, 1000)
+        self.assertEqual(text, "     1  " + "x" * 1000)
+
+    def test_read_lines_stops_between_lines(self):
+        self.write(b"a\nb\nc\n")
+        self.assertEqual(read_lines(self.path, 1, 3, max_bytes=4), ("     1  a\n     2  b\n", 4))
+
+    def test_search_one_hit_per_line(self):
+        self.write(b"alpha beta\nBETA beta beta\ngamma\nbeta")
+        self.assertEqual(search_file(self.path, "beta"), "     1  alpha beta\n     2  BETA beta beta\n     4  beta")
+
+    def test_search_long_line_is_linear_and_capped(self):
+        self.write(b"ab" * 2500000 + b"\nlast ab\n")
+        started = time.perf_counter()
+        result = search_file(self.path, "a", max_bytes=1000)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertIn("[line truncated]", result)
+        self.assertLess(len(result), 1200)
+        self.assertEqual(search_file(self.path, "last"), "     2  last ab")
+
+    def test_search_total_output_capped(self):
+        self.write(b"".join(b"hit %d " % n + b"y" * 200 + b"\n" for n in range(15)))
+        result = search_file(self.path, "hit", max_bytes=1000)
+        self.assertTrue(result.endswith("... (stopped after 1000 bytes of matches)"))
+        self.assertLess(result.count("\n"), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
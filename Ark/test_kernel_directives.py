@@ -0,0 +1,64 @@
+"""
+Tests for the kernel's directive ordering and early tool start
+(run: python -m unittest test_kernel_directives)
+"""
+
+import unittest
+from unittest import mock
+
+import kernel
+
+
+def plan(ai_text):
+    return kernel.plan_directives(kernel.parse_directives(ai_text))
+
+
+class FakeLLM:
+
+    def __init__(self, lines):
+        self.lines = lines
+
+    def chat(self, **kwargs):
+        for line in self.lines:
+            yield {'message': {'content': line}}
+        yield {'done': True, 'message': {'content': ''}}
+
+
+class PlanDirectivesTest(unittest.TestCase):
+
+    def test_reads_run_together(self):
+        self.assertEqual(plan("READ: a.txt\nREAD: b.txt\n"), [[0, 1]])
+
+    def test_read_only_command_runs_with_reads(self):
+        self.assertEqual(plan("READ: a.txt\nCMD: python librarian.py search legs\n"), [[0, 1]])
+
+    def test_read_only_command_waits_for_edit(self):
+        self.assertEqual(plan("WRITE: a.txt | x\nCMD: python researcher.py search legs\n"), [[0], [1]])
+
+    def test_command_is_barrier_for_later_read(self):
+        self.assertEqual(plan("CMD: python x.py > out.txt\nREAD: out.txt\n"), [[0], [1]])
+
+    def test_command_waits_for_earlier_read(self):
+        self.assertEqual(plan("READ: a.txt\nCMD: del a.txt\n"), [[0], [1]])
+
+
+class StreamReplyTest(unittest.TestCase):
+
+    def stream(self, lines):
+        with mock.patch.object(kernel, '_llm', lambda: FakeLLM(lines)), \
+             mock.patch.object(kernel, 'execute_directive', lambda directive: directive.kind):
+            ai_text, directives, started = kernel.stream_reply([], "", on_token=lambda token: None)
+            return directives, {i: future.result() for i, future in started.items()}
+
+    def test_read_starts_early(self):
+        directives, started = self.stream(["READ: a.txt\n", "done\n"])
+        self.assertEqual(started, {0: 'READ'})
+
+    def test_read_after_command_waits(self):
+        directives, started = self.stream(["CMD: echo hi > a.txt\n", "READ: a.txt\n"])
+        self.assertEqual(len(directives), 2)
+        self.assertEqual(started, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Tests for the /search and /save REPL modes (run: python -m unittest test_kernel_modes)
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import async_kernel
+import kernel
+import librarian
+
+
+NOTES = ["squat depth below parallel", "squat stance width", "deadlift depth"]
+
+
+class SearchModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_modes_")
+        with open(os.path.join(self.dir, "notes.txt"), "w", encoding="utf-8") as f:
+            f.write("".join(f"\n{note}\n" for note in NOTES))
+        patcher = mock.patch.multiple(librarian, LIBRARY_DIR=self.dir, INDEX=None, USE_INDEX=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def repl(self, *lines):
+        """Run kernel.main on the given input lines and return what it printed"""
+        output = io.StringIO()
+        with mock.patch("builtins.input", side_effect=list(lines) + ["exit"]), \
+             mock.patch.object(kernel, "refresh_ollama_status"), \
+             contextlib.redirect_stdout(output):
+            kernel.main()
+        return output.getvalue()
+
+    def test_quoted_phrase(self):
+        output = self.repl('/search "squat depth"')
+        self.assertIn("Searching for '\"squat depth\"'", output)
+        self.assertIn("squat depth below parallel", output)
+        self.assertNotIn("squat stance width", output)
+
+    def test_multi_word_query_is_not_cut(self):
+        output = self.repl("/search deadlift depth")
+        self.assertIn("Searching for 'deadlift depth'", output)
+        self.assertIn("deadlift depth", output)
+
+    def test_save_keeps_quotes(self):
+        self.repl('/save coach said "knees out"')
+        with open(os.path.join(self.dir, "notes.txt"), encoding="utf-8") as f:
+            self.assertIn('coach said "knees out"', f.read())
+
+    def test_async_kernel_search(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            asyncio.run(async_kernel.AsyncKernel().handle('/search "squat depth"'))
+        self.assertIn("squat depth below parallel", output.getvalue())
+        self.assertNotIn("squat stance width", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Tests for library_compactor (run: python -m unittest test_library_compactor)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from library_compactor import compact_file, deduplicate
+
+
+NOTES = ["gmail password is hunter2024",
+         "phone number 040 123 4567",
+         "Gmail password is hunter2024",
+         "gmail password is hunter2025",
+         "phone number 040 123 4568"]
+
+
+class DeduplicateTest(unittest.TestCase):
+
+    def test_near_duplicates_only_counted_by_default(self):
+        result = deduplicate(NOTES)
+        self.assertEqual(result.duplicates, 1)
+        self.assertEqual(result.near_duplicates, 2)
+        self.assertIn("gmail password is hunter2025", result.notes)
+        self.assertIn("phone number 040 123 4567", result.notes)
+        self.assertEqual(len(result.notes), 4)
+
+    def test_drop_near_keeps_newest(self):
+        result = deduplicate(NOTES, drop_near=True)
+        self.assertEqual(result.notes, ["gmail password is hunter2025", "phone number 040 123 4568"])
+
+    def test_unrelated_notes_untouched(self):
+        notes = ["squat 100kg", "futsal on tuesday", "dog is named rex"]
+        self.assertEqual(deduplicate(notes, drop_near=True).notes, notes)
+
+    def test_threshold_one_disables_near_duplicates(self):
+        result = deduplicate(NOTES, threshold=1.0, drop_near=True)
+        self.assertEqual(result.near_duplicates, 0)
+        self.assertEqual(len(result.notes), 4)
+
+
+class CompactFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_compact_")
+        self.path = os.path.join(self.dir, "notes.txt")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("\nsquat   100kg\n\n\nsquat 100kg\n\nfutsal on tuesday\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def read(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def test_rewrites_one_note_per_line(self):
+        report = compact_file(self.path)
+        self.assertEqual(self.read(), "squat 100kg\nfutsal on tuesday\n")
+        self.assertEqual((report.notes_before, report.notes_after, report.duplicates), (3, 2, 1))
+
+    def test_dry_run_leaves_file(self):
+        before = self.read()
+        report = compact_file(self.path, dry_run=True)
+        self.assertEqual(self.read(), before)
+        self.assertEqual(report.notes_after, 2)
+
+    def test_keeps_permissions(self):
+        if os.name == "nt":
+            self.skipTest("POSIX permissions")
+        os.chmod(self.path, 0o644)
+        compact_file(self.path)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+
+if __name__ == "__main__":
+    unittest.main()
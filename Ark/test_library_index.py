@@ -0,0 +1,135 @@
+"""
+Tests for library_index.LibraryIndex (run: python -m unittest test_library_index)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import librarian
+from library_index import LibraryIndex
+
+
+def file_notes(path):
+    """(line_no, text) of every non-blank line, numbered the way the index numbers them"""
+    with open(path, "r", encoding="utf-8") as f:
+        return [(n, line.strip()) for n, line in enumerate(f, start=1) if line.strip()]
+
+
+class LibraryIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_index_")
+        self.path = os.path.join(self.dir, "notes.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def write(self, text, mode="w"):
+        with open(self.path, mode, encoding="utf-8") as f:
+            f.write(text)
+
+    def append(self, index, contents):
+        """Append the way librarian._append_notes does and tell the index"""
+        stat = os.stat(self.path) if os.path.exists(self.path) else None
+        stat_before = (stat.st_mtime_ns, stat.st_size) if stat else None
+        self.write("".join(f"\n{content}\n" for content in contents), "a")
+        return index.notes_appended("notes.txt", contents, stat_before)
+
+    def indexed(self, index):
+        return [(line_no, text) for _, line_no, text in index.notes_in(["notes.txt"])]
+
+    def test_append_line_numbers_match_file(self):
+        self.write("squat depth\n\nknee pain\n")
+        index = LibraryIndex(self.dir)
+        index.refresh()
+        added = self.append(index, ["bench press", "deadlift form"])
+        added += self.append(index, ["two\nlines"])
+        self.assertEqual([(n, t) for _, n, t in added], file_notes(self.path)[2:])
+        self.assertEqual(self.indexed(index), file_notes(self.path))
+
+    def test_journal_reload_keeps_line_numbers(self):
+        index = LibraryIndex(self.dir)
+        self.append(index, ["first note"])
+        self.append(index, ["second note"])
+        self.assertEqual(self.indexed(LibraryIndex(self.dir)), file_notes(self.path))
+
+    def test_refresh_picks_up_outside_edits(self):
+        self.write("squat depth\nknee pain\n")
+        index = LibraryIndex(self.dir)
+        index.refresh()
+        self.write("inserted at top\nsquat depth\nknee pain\n")
+        self.assertFalse(index.is_fresh())
+        self.assertTrue(index.refresh())
+        self.assertTrue(index.is_fresh())
+        self.assertEqual(self.indexed(index), file_notes(self.path))
+        self.assertEqual([n for _, n, _ in index.lookup("knee pain")], [3])
+
+    def test_append_after_outside_edit_reindexes(self):
+        self.write("one\n")
+        index = LibraryIndex(self.dir)
+        index.refresh()
+        self.write("zero\n", "a")  # edited behind the index's back
+        self.assertEqual(self.append(index, ["two"]), [])
+        self.assertEqual(self.indexed(index), file_notes(self.path))
+
+    def test_deleted_file_is_dropped(self):
+        self.write("squat\n")
+        index = LibraryIndex(self.dir)
+        index.refresh()
+        os.remove(self.path)
+        index.refresh()
+        self.assertEqual(index.ranked("squat"), [])
+
+    def test_phrase_and_ranked_queries(self):
+        self.write("squat depth was good\nknee pain after squat\nsquatting depth\n")
+        index = LibraryIndex(self.dir)
+        index.refresh()
+        self.assertEqual([n for _, n, _ in index.lookup("squat depth")], [1])
+        self.assertEqual([n for _, n, _ in index.lookup("squat* depth")], [1, 3])
+        self.assertEqual(index.lookup("depth squat"), [])
+        self.assertEqual(index.ranked("knee", 5)[0].line_no, 2)
+
+    def test_fuzzy_forgives_transposed_letters(self):
+        self.write("squat depth was good\nknee pain after squat\nbench press\n")
+        index = LibraryIndex(self.dir)
+        index.refresh()
+        self.assertEqual([t for _, t in index.similar_tokens("sqaut")], ["squat"])
+        self.assertEqual([t for _, t in index.similar_tokens("pian")], ["pain"])
+        self.assertEqual(index.fuzzy("kne pian", 5)[0].line_no, 2)
+
+
+
+class BulkImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix="ark_test_import_")
+        self.source = tempfile.mkdtemp(prefix="ark_test_import_src_")
+        for name in ("legs", "arms"):
+            with open(os.path.join(self.source, name + ".md"), "w", encoding="utf-8") as f:
+                f.write("".join(f"{name} note {i}\n\n" for i in range(2500)))
+        patcher = mock.patch.multiple(librarian, LIBRARY_DIR=self.dir, INDEX=None, USE_INDEX=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        shutil.rmtree(self.source, ignore_errors=True)
+
+    def test_one_snapshot_per_import(self):
+        with mock.patch.object(LibraryIndex, "save", autospec=True, side_effect=LibraryIndex.save) as save:
+            result = librarian.import_notes(self.source)
+        self.assertIn("Imported 5000 notes", result)
+        self.assertEqual(save.call_count, 1)  # not one per IMPORT_BATCH
+        self.assertFalse(os.path.exists(os.path.join(self.dir, ".index.log")))
+
+        reloaded = LibraryIndex(self.dir)
+        self.assertEqual(reloaded.live_notes, 5000)
+        self.assertTrue(reloaded.is_fresh())
+        self.assertEqual(len(reloaded.lookup("legs note 2499")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tracing - Lightweight span instrumentation for the kernel
+
+Records (name, start, duration) spans in a rolling in-memory buffer.
+Spans can be summarized as p50/p95 per name or exported as JSONL or
+Chrome trace format (open in chrome://tracing or ui.perfetto.dev).
+"""
+
+import collections
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class Tracer:
+    """
+    Rolling span buffer
+
+    Spans are plain dicts so they export without conversion:
+    {"name", "start", "duration", "tid", "args"} with times in seconds.
+    """
+
+    def __init__(self, capacity: int = 2000):
+        """
+        Initialize tracer
+
+        Args:
+            capacity: Number of most recent spans to keep
+        """
+        self.spans = collections.deque(maxlen=capacity)
+        self.origin = time.perf_counter()
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args):
+        """Time the enclosed block as one span"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter() - start, **args)
+
+    def record(self, name: str, start: float, duration: float, **args):
+        """Add an already-measured span (start is a perf_counter value)"""
+        if not self.enabled:
+            return
+        self.spans.append({
+            "name": name,
+            "start": start - self.origin,
+            "duration": duration,
+            "tid": threading.get_ident(),
+            "args": args,
+        })
+
+    def clear(self):
+        self.spans.clear()
+
+    def set_capacity(self, capacity: Optional[int]):
+        """Keep the most recent capacity spans from now on (None = keep every span)"""
+        self.spans = collections.deque(self.spans, maxlen=capacity)
+
+    def percentiles(self, names: Optional[List[str]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Per-name latency summary
+
+        Returns:
+            {name: {"count", "p50", "p95", "max"}} with times in seconds
+        """
+        grouped = collections.defaultdict(list)
+        for span in list(self.spans):
+            if names is None or span["name"] in names:
+                grouped[span["name"]].append(span["duration"])
+
+        summary = {}
+        for name, durations in grouped.items():
+            durations.sort()
+            last = len(durations) - 1
+            summary[name] = {
+                "count": len(durations),
+                "p50": durations[round(last * 0.50)],
+                "p95": durations[round(last * 0.95)],
+                "max": durations[last],
+            }
+        return summary
+
+    def report(self) -> str:
+        """Text table of p50/p95 per phase, slowest first"""
+        summary = self.percentiles()
+        if not summary:
+            return "No spans recorded yet."
+        lines = [f"{'PHASE':<24}{'COUNT':>7}{'P50 ms':>10}{'P95 ms':>10}"]
+        for name, stats in sorted(summary.items(), key=lambda item: -item[1]["p95"]):
+            lines.append(f"{name:<24}{stats['count']:>7}"
+                         f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def export_jsonl(self, path: str) -> int:
+        """Write one span per line; returns the number of spans written"""
+        spans = list(self.spans)
+        with open(path, "w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span) + "\n")
+        return len(spans)
+
+    def export_chrome(self, path: str) -> int:
+        """Write spans as Chrome trace "complete" events; returns the count"""
+        spans = list(self.spans)
+        events = [{
+            "name": span["name"],
+            "ph": "X",
+            "ts": span["start"] * 1e6,
+            "dur": span["duration"] * 1e6,
+            "pid": os.getpid(),
+            "tid": span["tid"],
+            "args": span["args"],
+        } for span in spans]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(spans)
+
+
+# Shared tracer for the kernel process
+TRACER = Tracer()
+span = TRACER.span